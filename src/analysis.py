@@ -0,0 +1,243 @@
+import argparse
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+from loguru import logger
+
+from logs.log_config import configure_logging
+from src.compressed_csv import compression, csv_stem, strip_compression
+from src.config import EXTERNAL_DATA_DIR, INTERIM_DATA_DIR, PROCESSED_DATA_DIR, RAW_DATA_DIR
+from src.storage_backends import DuckDBBackend, quote_name
+
+# Constants
+ANALYSIS_THREADS = int(os.environ.get('ANALYSIS_THREADS', 0)) or None
+# Searched in this order; a later directory's file wins over an earlier one of the same name
+DATA_DIRS = [RAW_DATA_DIR, EXTERNAL_DATA_DIR, INTERIM_DATA_DIR, PROCESSED_DATA_DIR]
+# Suffix ParquetCache adds to its copies: -<first 16 hex digits of the source's SHA-256>
+CACHE_SUFFIX = re.compile(r'-[0-9a-f]{16}$')
+SPEND_PERCENTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+COHORT_PERIODS = ('month', 'quarter', 'year')
+
+
+class CustomerAnalysis:
+    def __init__(self, data_dirs: Sequence[Path] = DATA_DIRS,
+                 threads: Optional[int] = ANALYSIS_THREADS) -> None:
+        '''Runs read-only aggregate queries on the data files in place with DuckDB.
+
+        Every CSV and Parquet file in data_dirs becomes a view named like the table the
+        loader would create (customers_dataset.csv -> customers); gzip and zstd compressed
+        CSVs are decompressed by DuckDB as they are scanned. Parquet copies made by
+        ParquetCache are used instead of their CSV while they are at least as new. Queries
+        are planned and run by DuckDB's vectorized engine on threads cores (all by
+        default), reading only the columns they use; nothing goes through MySQL.
+        '''
+        self.connection = duckdb.connect()
+        if threads:
+            self.connection.execute(f'SET threads = {int(threads)}')
+        self.views = self.register_views(data_dirs)
+
+    def register_views(self, data_dirs: Sequence[Path]) -> Dict[str, Path]:
+        '''Creates a view over each data file and returns the file behind each view.'''
+        files: Dict[str, Path] = {}
+        for data_dir in data_dirs:
+            if not Path(data_dir).is_dir():
+                continue
+            for path in sorted(Path(data_dir).iterdir()):
+                if path.suffix != '.parquet' and not strip_compression(path.name).endswith('.csv'):
+                    continue
+                # DuckDB's read_csv decompresses gzip and zstd itself, but not bz2 or xz
+                codec = compression(path)
+                if codec and codec not in DuckDBBackend.native_compressions:
+                    logger.warning(f'Skipping "{path}": DuckDB cannot read {codec} files.')
+                    continue
+                name = view_name(path)
+                current = files.get(name)
+                # A Parquet copy only stands in for its CSV while the CSV has not changed since
+                if current is not None and \
+                        (current.suffix == '.parquet') != (path.suffix == '.parquet'):
+                    csv_path, parquet_path = sorted(
+                        (current, path), key=lambda p: p.suffix == '.parquet'
+                    )
+                    if parquet_path.stat().st_mtime < csv_path.stat().st_mtime:
+                        path = csv_path
+                    else:
+                        path = parquet_path
+                files[name] = path
+        for name, path in files.items():
+            reader = 'read_parquet' if path.suffix == '.parquet' else 'read_csv'
+            self.connection.execute(
+                f'CREATE OR REPLACE VIEW {quote_name(name)} AS '
+                f'SELECT * FROM {reader}({sql_string(path)})'
+            )
+            logger.info(f'View "{name}" reads "{path}".')
+        if not files:
+            logger.warning(f'No CSV or Parquet files found in {", ".join(map(str, data_dirs))}.')
+        return files
+
+    def query(self, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
+        '''Runs a SQL query over the views and returns the result as a DataFrame.'''
+        return self.connection.execute(sql, params or []).df()
+
+    def tables(self) -> pd.DataFrame:
+        '''Returns every view with its source file, row count and columns.'''
+        return pd.DataFrame([
+            {
+                'table': name,
+                'file': str(path),
+                'rows': self.connection.execute(
+                    f'SELECT COUNT(*) FROM {quote_name(name)}'
+                ).fetchone()[0],
+                'columns': ', '.join(
+                    row[0] for row in self.connection.execute(
+                        f'DESCRIBE {quote_name(name)}'
+                    ).fetchall()
+                )
+            }
+            for name, path in self.views.items()
+        ])
+
+    def counts_by(self, table: str, columns: Sequence[str] = ('segment',)) -> pd.DataFrame:
+        '''Returns the number and share of customers for each combination of the columns.'''
+        group = ', '.join(quote_name(column) for column in columns)
+        return self.query(
+            f'SELECT {group}, COUNT(*) AS customers, '
+            f'ROUND(COUNT(*) / SUM(COUNT(*)) OVER (), 4) AS share '
+            f'FROM {quote_name(table)} GROUP BY ALL ORDER BY customers DESC'
+        )
+
+    def spend_distribution(self, table: str, column: str = 'total_spend',
+                           by: Optional[str] = None) -> pd.DataFrame:
+        '''Returns count, mean, spread and percentiles of the column, overall or per group.'''
+        value = quote_name(column)
+        percentiles = ', '.join(
+            f'QUANTILE_CONT({value}, {p}) AS p{round(p * 100)}' for p in SPEND_PERCENTILES
+        )
+        group = f'{quote_name(by)}, ' if by else ''
+        return self.query(
+            f'SELECT {group}COUNT({value}) AS customers, SUM({value}) AS total, '
+            f'AVG({value}) AS mean, STDDEV_SAMP({value}) AS std, MIN({value}) AS min, '
+            f'{percentiles}, MAX({value}) AS max '
+            f'FROM {quote_name(table)}{" GROUP BY ALL ORDER BY total DESC" if by else ""}'
+        )
+
+    def cohorts(self, table: str, signup_column: str = 'signup_date',
+                activity_column: str = 'last_purchase_date', period: str = 'month',
+                max_periods: int = 12) -> pd.DataFrame:
+        '''Returns the retention table of sign-up cohorts.
+
+        Customers are grouped by the period they signed up in; column k holds the share of
+        a cohort whose last activity is at least k periods after sign-up, for k up to
+        max_periods. The cohort size is in the "customers" column.
+        '''
+        if period not in COHORT_PERIODS:
+            raise ValueError(f'Unknown cohort period "{period}".')
+        signup = f'CAST({quote_name(signup_column)} AS DATE)'
+        activity = f'CAST({quote_name(activity_column)} AS DATE)'
+        counts = self.query(
+            f"SELECT DATE_TRUNC('{period}', {signup}) AS cohort, "
+            f"LEAST(DATE_DIFF('{period}', {signup}, {activity}), {int(max_periods)}) AS periods, "
+            f'COUNT(*) AS customers '
+            f'FROM {quote_name(table)} WHERE {signup} IS NOT NULL AND {activity} IS NOT NULL '
+            f'GROUP BY ALL'
+        )
+        if counts.empty:
+            return counts
+        # Customers still active k periods in = those whose lifetime is k or more
+        lifetimes = counts.pivot_table(
+            index='cohort', columns='periods', values='customers', aggfunc='sum', fill_value=0
+        ).reindex(columns=range(max_periods + 1), fill_value=0)
+        retained = lifetimes.iloc[:, ::-1].cumsum(axis=1).iloc[:, ::-1]
+        sizes = retained[0]
+        shares = retained.div(sizes, axis=0).round(4)
+        shares.insert(0, 'customers', sizes)
+        shares.columns.name = f'{period}s since sign-up'
+        return shares.sort_index()
+
+    def close(self) -> None:
+        '''Closes the DuckDB connection.'''
+        self.connection.close()
+
+
+def view_name(path: Path) -> str:
+    '''Returns the view name of a data file: its stem without cache hash or "_dataset".'''
+    name = CACHE_SUFFIX.sub('', csv_stem(path))
+    return name[:-8] if name.endswith('_dataset') else name
+
+def sql_string(value: object) -> str:
+    '''Quotes a value as a SQL string literal.'''
+    return "'" + str(value).replace("'", "''") + "'"
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    '''Parses the command line.'''
+    parser = argparse.ArgumentParser(
+        description='Aggregate queries over the customer CSV and Parquet files with DuckDB.'
+    )
+    parser.add_argument('--data-dir', type=Path, action='append',
+                        help='directory to read (repeatable; default: every data/ directory)')
+    parser.add_argument('--threads', type=int, default=ANALYSIS_THREADS)
+    parser.add_argument('--output', type=Path, help='also write the result to this CSV file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('tables', help='list the views and their files')
+
+    counts = commands.add_parser('counts', help='customer counts by one or more columns')
+    counts.add_argument('--table')
+    counts.add_argument('--by', nargs='+', default=['segment'])
+
+    spend = commands.add_parser('spend', help='distribution of a numeric column')
+    spend.add_argument('--table')
+    spend.add_argument('--column', default='total_spend')
+    spend.add_argument('--by')
+
+    cohorts = commands.add_parser('cohorts', help='retention table of sign-up cohorts')
+    cohorts.add_argument('--table')
+    cohorts.add_argument('--signup-column', default='signup_date')
+    cohorts.add_argument('--activity-column', default='last_purchase_date')
+    cohorts.add_argument('--period', choices=COHORT_PERIODS, default='month')
+    cohorts.add_argument('--max-periods', type=int, default=12)
+
+    sql = commands.add_parser('sql', help='run any read-only SQL over the views')
+    sql.add_argument('query')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    '''Main entry point for the script.'''
+    configure_logging(__file__)  # Set up logging at the start of the program
+    args = parse_args(argv)
+
+    analysis = CustomerAnalysis(args.data_dir or DATA_DIRS, threads=args.threads)
+    # Without --table, use the only view there is, or the generator's "customers"
+    table = getattr(args, 'table', None) or (
+        next(iter(analysis.views)) if len(analysis.views) == 1 else 'customers'
+    )
+    try:
+        if args.command == 'tables':
+            result = analysis.tables()
+        elif args.command == 'counts':
+            result = analysis.counts_by(table, args.by)
+        elif args.command == 'spend':
+            result = analysis.spend_distribution(table, args.column, args.by)
+        elif args.command == 'cohorts':
+            result = analysis.cohorts(
+                table, args.signup_column, args.activity_column, args.period, args.max_periods
+            )
+        else:
+            result = analysis.query(args.query)
+    except duckdb.Error as e:
+        logger.error(f'Query failed: {e}')
+        exit(1)
+    finally:
+        analysis.close()
+    with pd.option_context('display.max_rows', None, 'display.width', None):
+        print(result.to_string(index=args.command == 'cohorts'))
+    if args.output:
+        result.to_csv(args.output, index=args.command == 'cohorts')
+        logger.info(f'Result written to "{args.output}".')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+from typing import Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from src.compressed_csv import open_csv
+from src.schema import ISO_DATE_FORMATS, ColumnSchema, TableSchema
+
+# Bytes of CSV handed to each parsing thread
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def arrow_type(column: ColumnSchema, exact_decimals: bool = True) -> pa.DataType:
+    '''Maps an inferred column to the Arrow type its CSV values are parsed into.
+
+    With exact_decimals, DECIMAL columns stay strings so MySQL rounds them exactly as it
+    would a literal, instead of going through a binary float or failing on an unseen
+    scale; otherwise they are parsed as doubles, as pandas would.
+    '''
+    mysql_type = column.mysql_type.upper()
+    if column.kind == 'boolean':
+        return pa.bool_()
+    if column.kind == 'integer' and not mysql_type.startswith('DECIMAL'):
+        return pa.uint64() if mysql_type.endswith('UNSIGNED') else pa.int64()
+    if column.kind == 'decimal' and (mysql_type == 'DOUBLE' or not exact_decimals):
+        return pa.float64()
+    if column.kind == 'date' and column.date_format in ISO_DATE_FORMATS:
+        return pa.date32()
+    if column.kind in ('date', 'datetime'):
+        return pa.timestamp('s')
+    return pa.string()
+
+def convert_options(schema: TableSchema, exact_decimals: bool = True) -> 'pacsv.ConvertOptions':
+    '''Builds convert options pinning every column to its type from the schema.'''
+    date_formats = {column.date_format for column in schema.columns if column.date_format}
+    return pacsv.ConvertOptions(
+        column_types={
+            column.name: arrow_type(column, exact_decimals) for column in schema.columns
+        },
+        timestamp_parsers=[pacsv.ISO8601, *sorted(date_formats - ISO_DATE_FORMATS)],
+        strings_can_be_null=True
+    )
+
+def read_csv_batches(file_path: str, schema: TableSchema, max_rows: Optional[int] = None,
+                     block_size: int = ARROW_BLOCK_SIZE,
+                     exact_decimals: bool = True) -> Iterator[pa.RecordBatch]:
+    '''Yields the CSV file as Arrow record batches typed by the schema.
+
+    Without max_rows the whole file is parsed on all cores at once and then sliced into
+    batches without copying; with max_rows it is streamed block by block on one thread
+    so memory stays flat. Compressed files are decompressed as they are parsed.
+    '''
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=block_size)
+    options = convert_options(schema, exact_decimals)
+    with open_csv(file_path) as source:
+        if max_rows is None:
+            table = pacsv.read_csv(source, read_options=read_options, convert_options=options)
+            yield from table.to_batches()
+            return
+        with pacsv.open_csv(source, read_options=read_options, convert_options=options) as reader:
+            for batch in reader:
+                for offset in range(0, batch.num_rows, max_rows):
+                    yield batch.slice(offset, max_rows)
+
+def batch_rows(batch: pa.RecordBatch) -> List[tuple]:
+    '''Converts a record batch to a list of tuples of native Python values (null -> None).'''
+    return list(zip(*(column.to_pylist() for column in batch.columns)))
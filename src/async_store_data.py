@@ -0,0 +1,213 @@
+import asyncio
+import os
+import time
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, List, Optional
+
+import aiomysql
+import pandas as pd
+from loguru import logger
+
+from logs.log_config import configure_logging
+from src.compressed_csv import open_csv
+from src.config import EXTERNAL_DATA_DIR
+from src.loading import (CSV_ERRORS, get_table_name, infer_table_schema, load_result,
+                         log_csv_error, log_load_summary)
+from src.rows import frame_rows
+from src.schema import TableSchema, csv_dtypes, load_schema_overrides, quote_identifier
+from src.store_data import (INSERT_BATCH_SIZE, MYSQL_DATABASE, MYSQL_HOST, MYSQL_PASSWORD,
+                            MYSQL_USERNAME, get_files)
+
+# Constants
+MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
+ASYNC_IN_FLIGHT = int(os.environ.get('ASYNC_IN_FLIGHT', 8))
+ASYNC_CHUNKSIZE = int(os.environ.get('ASYNC_CHUNKSIZE', 50_000))
+ASYNC_MAX_POOL_SIZE = 32
+
+
+class AsyncCSVToMySQLLoader:
+    def __init__(self, db_settings: dict, csv_files: List[str], in_flight: int = ASYNC_IN_FLIGHT,
+                 batch_size: int = INSERT_BATCH_SIZE, chunksize: int = ASYNC_CHUNKSIZE,
+                 schema_overrides: Optional[dict] = None, pool: Any = None) -> None:
+        '''Initializes the asyncio counterpart of CSVToMySQLLoader.
+
+        Every file is loaded concurrently: CSV chunks are parsed and converted in the
+        default executor while up to in_flight insert batches per table are awaited on the
+        event loop. db_settings takes host, user, password, database and optionally port.
+        pool may be an existing aiomysql-compatible pool (acquire() yielding connections
+        with cursor() and commit()), e.g. one pointed at a local stand-in server.
+        '''
+        self.db_settings = db_settings
+        self.csv_files = csv_files
+        self.in_flight = in_flight
+        self.batch_size = batch_size
+        self.chunksize = chunksize
+        self.schema_overrides = (
+            load_schema_overrides() if schema_overrides is None else schema_overrides
+        )
+        self.pool = pool
+
+    async def load_csv_to_db(self) -> List[dict]:
+        '''Loads every CSV file concurrently and returns the per-file results.'''
+        own_pool = self.pool is None
+        if own_pool:
+            settings = {'port': MYSQL_PORT, **self.db_settings}
+            self.pool = await aiomysql.create_pool(
+                minsize=1,
+                maxsize=min(self.in_flight * max(len(self.csv_files), 1), ASYNC_MAX_POOL_SIZE),
+                host=settings['host'],
+                port=settings['port'],
+                user=settings['user'],
+                password=settings['password'],
+                db=settings['database'],
+                autocommit=False
+            )
+        try:
+            results = await asyncio.gather(
+                *(self.load_file(csv_file) for csv_file in self.csv_files)
+            )
+        finally:
+            if own_pool:
+                self.pool.close()
+                await self.pool.wait_closed()
+                self.pool = None
+        log_load_summary(results)
+        return results
+
+    async def load_file(self, csv_file: str) -> dict:
+        '''Replaces the file's table with the file contents and returns a load summary.'''
+        loop = asyncio.get_running_loop()
+        table_name = get_table_name(csv_file)
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.in_flight)
+        tasks = []
+        schema = None
+        error = False
+        # Closes the decompressing stream of a compressed file once it has been read
+        stack = ExitStack()
+        try:
+            dtypes = await loop.run_in_executor(None, csv_dtypes, csv_file)
+            source = stack.enter_context(open_csv(csv_file))
+            reader = await loop.run_in_executor(
+                None, partial(pd.read_csv, source, chunksize=self.chunksize, dtype=dtypes)
+            )
+            with reader:
+                while True:
+                    chunk = await loop.run_in_executor(None, next, reader, None)
+                    if chunk is None:
+                        break
+                    if schema is None:
+                        schema = infer_table_schema(
+                            chunk, table_name, self.schema_overrides, sample=True
+                        )
+                        await self.execute(f'DROP TABLE IF EXISTS {table_name}')
+                        await self.execute(f'CREATE TABLE {table_name} ({schema.definition()})')
+                        placeholders = ', '.join(['%s'] * len(schema.columns))
+                        insert_query = f'INSERT INTO {table_name} VALUES ({placeholders})'
+                    rows = await loop.run_in_executor(None, convert_chunk, schema, chunk)
+                    for batch_start in range(0, len(rows), self.batch_size):
+                        # Waiting here keeps at most in_flight batches of this table in memory
+                        await semaphore.acquire()
+                        batch = rows[batch_start:batch_start + self.batch_size]
+                        tasks.append(asyncio.create_task(
+                            self.insert_batch(insert_query, batch, semaphore)
+                        ))
+        except CSV_ERRORS as e:
+            log_csv_error(csv_file, e)
+            error = True
+        except Exception as e:
+            logger.error(f'Error loading "{csv_file}" into {table_name}: {e}')
+            error = True
+        finally:
+            stack.close()
+        # Batches already in flight still finish, but a file that stopped part-way fails
+        inserted = await asyncio.gather(*tasks)
+        failed = error or schema is None or any(count is None for count in inserted)
+        rows = sum(count for count in inserted if count)
+        index_seconds = 0.0
+        if not failed:
+            index_seconds = await self.build_keys(table_name, schema)
+            logger.info(f'Data inserted into "{table_name}".')
+        return load_result(
+            csv_file, table_name, rows, time.perf_counter() - start, index_seconds,
+            'failed' if failed else 'loaded'
+        )
+
+    async def insert_batch(self, insert_query: str, rows: List[tuple],
+                           semaphore: asyncio.Semaphore) -> Optional[int]:
+        '''Inserts one batch on its own pooled connection and commits it.'''
+        try:
+            async with self.pool.acquire() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.executemany(insert_query, rows)
+                await connection.commit()
+            return len(rows)
+        except Exception as e:
+            logger.error(f'Error inserting batch: {e}')
+            return None
+        finally:
+            semaphore.release()
+
+    async def build_keys(self, table_name: str, schema: TableSchema) -> float:
+        '''Adds the schema's keys after the load, demoting a non-unique primary key.'''
+        if schema.primary_key:
+            quoted = ', '.join(quote_identifier(column) for column in schema.primary_key)
+            total, distinct = await self.fetchone(
+                f'SELECT COUNT(*), COUNT(DISTINCT {quoted}) FROM {table_name}'
+            )
+            if total != distinct:
+                schema.indexes.insert(0, schema.primary_key)
+                schema.primary_key = []
+        clauses = schema.key_clauses()
+        if not clauses:
+            return 0.0
+        start = time.perf_counter()
+        try:
+            await self.execute(f'ALTER TABLE {table_name} {", ".join(clauses)}')
+        except Exception as e:
+            logger.error(f'Error building keys on {table_name}: {e}')
+            return 0.0
+        return time.perf_counter() - start
+
+    async def execute(self, query: str) -> None:
+        '''Runs a statement on a pooled connection and commits.'''
+        async with self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query)
+            await connection.commit()
+
+    async def fetchone(self, query: str) -> tuple:
+        '''Runs a query on a pooled connection and returns its first row.'''
+        async with self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query)
+                return await cursor.fetchone()
+
+
+def convert_chunk(schema: TableSchema, chunk: pd.DataFrame) -> List[tuple]:
+    '''Coerces a chunk to the schema and converts it to insert-ready tuples.'''
+    return frame_rows(schema.coerce(chunk), schema)
+
+def main():
+    '''Main entry point for the script.'''
+    configure_logging(__file__)  # Set up logging at the start of the program
+
+    # Database connection settings
+    db_settings = {
+        'host': MYSQL_HOST,
+        'port': MYSQL_PORT,
+        'user': MYSQL_USERNAME,
+        'password': MYSQL_PASSWORD,
+        'database': MYSQL_DATABASE
+    }
+
+    # List of CSV files
+    csv_files = get_files(EXTERNAL_DATA_DIR, 'csv')
+
+    loader = AsyncCSVToMySQLLoader(db_settings, csv_files)
+    asyncio.run(loader.load_csv_to_db())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import os
+import time as timer
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+import pandas as pd
+from loguru import logger
+
+from src.arrow_csv import read_csv_batches
+from src.compressed_csv import compression, open_csv
+from src.loading import (CSV_ERRORS, get_table_name, infer_table_schema, load_result,
+                         log_csv_error, log_load_summary, staging_table_name, swap_in)
+from src.schema import SCHEMA_SAMPLE_ROWS, TableSchema, csv_dtypes, load_schema_overrides
+from src.storage_backends import (DUCKDB_DATABASE, SQLITE_DATABASE, Batch, DuckDBBackend,
+                                  SQLiteBackend, StorageBackend)
+
+# Constants
+BACKEND_CHUNKSIZE = int(os.environ.get('BACKEND_CHUNKSIZE', 100_000))
+
+
+class BackendLoader:
+    def __init__(self, backend: StorageBackend, csv_files: List[str], engine: str = 'pandas',
+                 load_mode: str = 'replace', chunksize: int = BACKEND_CHUNKSIZE,
+                 schema_overrides: Optional[dict] = None) -> None:
+        '''Loads CSV files into any StorageBackend.
+
+        Each file's schema is inferred from a sample, as CSVToMySQLLoader does. A backend
+        with a native CSV reader loads the whole file itself; otherwise the file is
+        streamed in chunks of chunksize rows, parsed by pandas (engine="pandas") or by
+        pyarrow with the schema's column types (engine="arrow"), and inserted batch by
+        batch. load_mode is "append", "replace" or "swap" as for CSVToMySQLLoader; the
+        MySQL-only features (LOAD DATA, delta loads, checkpoints, deferred keys) need
+        CSVToMySQLLoader.
+        '''
+        if engine not in ('pandas', 'arrow'):
+            raise ValueError(f'Unknown load engine "{engine}".')
+        if load_mode not in ('append', 'replace', 'swap'):
+            raise ValueError(f'Unknown load mode "{load_mode}".')
+        self.backend = backend
+        self.csv_files = csv_files
+        self.engine = engine
+        self.load_mode = load_mode
+        self.chunksize = chunksize
+        self.schema_overrides = (
+            load_schema_overrides() if schema_overrides is None else schema_overrides
+        )
+
+    def load_csv_to_db(self) -> List[dict]:
+        '''Loads each CSV file into the backend and returns the per-file results.'''
+        results = [self.load_file(csv_file) for csv_file in self.csv_files]
+        log_load_summary(results)
+        return results
+
+    def load_file(self, csv_file: str) -> dict:
+        '''Loads a single CSV file into its table and returns a summary of the load.'''
+        table_name = get_table_name(csv_file)
+        target_table = staging_table_name(table_name) if self.load_mode == 'swap' else table_name
+        start = timer.perf_counter()
+        if self.load_mode != 'append':
+            self.backend.drop_table(target_table)
+        rows = self.load_table(csv_file, table_name, target_table)
+        if rows is not None and self.load_mode == 'swap':
+            if not swap_in(self.backend, table_name, target_table, rows):
+                rows = None
+        return load_result(
+            csv_file, table_name, rows or 0, timer.perf_counter() - start,
+            status='failed' if rows is None else 'loaded'
+        )
+
+    def load_table(self, csv_file: str, table_name: str, target_table: str) -> Optional[int]:
+        '''Creates the table and writes the file's rows; returns the row count or None.'''
+        try:
+            dtypes = csv_dtypes(csv_file)
+            with open_csv(csv_file) as source:
+                sample = pd.read_csv(source, nrows=SCHEMA_SAMPLE_ROWS, dtype=dtypes)
+        except CSV_ERRORS as e:
+            log_csv_error(csv_file, e)
+            return None
+        schema = infer_table_schema(sample, table_name, self.schema_overrides, sample=True)
+        self.backend.create_table(target_table, schema)
+        native = (None, *self.backend.native_compressions)
+        if self.backend.native_csv and compression(csv_file) in native:
+            return self.backend.load_csv(target_table, csv_file, schema)
+
+        rows = 0
+        failed = False
+        self.backend.prepare(target_table)
+        try:
+            for batch in self.iter_batches(csv_file, schema):
+                inserted = self.backend.insert_batch(target_table, batch, schema)
+                if inserted is None:
+                    failed = True
+                    break
+                rows += inserted
+        except CSV_ERRORS as e:
+            log_csv_error(csv_file, e, rows)
+            failed = True
+        except (OSError, ValueError) as e:
+            # pyarrow reports malformed rows and values that do not fit their type as ArrowInvalid
+            logger.error(f'Error parsing CSV file "{csv_file}" after {rows} rows: {e}')
+            failed = True
+        if not self.backend.finish(target_table, commit=not failed) or failed:
+            return None
+        logger.info(f'Streamed {rows} rows from "{csv_file}" into {self.backend.name}.')
+        return rows
+
+    def iter_batches(self, csv_file: str, schema: TableSchema) -> Iterator[Batch]:
+        '''Yields the file in batches of at most chunksize rows.'''
+        if self.engine == 'arrow':
+            yield from read_csv_batches(csv_file, schema, self.chunksize)
+            return
+        dtypes = csv_dtypes(csv_file)
+        with open_csv(csv_file) as source, \
+                pd.read_csv(source, chunksize=self.chunksize, dtype=dtypes) as reader:
+            for chunk in reader:
+                yield schema.coerce(chunk)
+
+
+def create_backend(name: str, path: Optional[Union[Path, str]] = None,
+                   **options: Any) -> StorageBackend:
+    '''Returns the backend of that name; path is the SQLite or DuckDB database file.
+
+    MySQL is loaded by CSVToMySQLLoader, which uses the server's own bulk paths.
+    '''
+    if name == 'sqlite':
+        return SQLiteBackend(path or SQLITE_DATABASE, **options)
+    if name == 'duckdb':
+        return DuckDBBackend(path or DUCKDB_DATABASE, **options)
+    raise ValueError(f'Unknown storage backend "{name}".')
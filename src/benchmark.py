@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from logs.log_config import configure_logging
+from src.config import REPORTS_DIR
+from src.generate_data import dataset_paths, generate_customers
+from src.loading import get_table_name
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+# The stand-in database defaults to a local server and its own schema, never the real one
+BENCHMARK_MYSQL_HOST = os.environ.get('BENCHMARK_MYSQL_HOST', '127.0.0.1')
+BENCHMARK_MYSQL_USERNAME = os.environ.get('BENCHMARK_MYSQL_USERNAME') or os.environ.get('MYSQL_USERNAME')
+BENCHMARK_MYSQL_PASSWORD = os.environ.get('BENCHMARK_MYSQL_PASSWORD') or os.environ.get('MYSQL_PASSWORD')
+BENCHMARK_MYSQL_DATABASE = os.environ.get('BENCHMARK_MYSQL_DATABASE', 'customer_benchmark')
+BENCHMARK_ROWS = (10_000, 100_000, 1_000_000)
+BENCHMARK_WORKERS = 4
+# Columns of a narrow dataset; a wide one has every customer column plus extra features
+NARROW_COLUMNS = ['customer_id', 'email', 'country', 'signup_date', 'total_orders', 'total_spend']
+WIDE_EXTRA_COLUMNS = 20
+
+# Loader options of each insert strategy; "parallel" loads the parts on worker threads,
+# "sqlite" and "duckdb" load into a local database file instead of the MySQL server
+STRATEGIES = {
+    'row': {'engine': 'pandas', 'insert_method': 'row'},
+    'executemany': {'engine': 'pandas', 'insert_method': 'executemany'},
+    'values': {'engine': 'pandas', 'insert_method': 'values'},
+    'infile': {'engine': 'infile'},
+    'parallel': {'engine': 'pandas', 'insert_method': 'executemany'},
+    'sqlite': {'backend': 'sqlite'},
+    'duckdb': {'backend': 'duckdb'},
+}
+
+
+def generate_dataset(data_dir: Path, rows: int, shape: str = 'narrow', parts: int = 1,
+                     seed: int = 0) -> List[str]:
+    '''Writes a customer dataset of rows rows split into parts files and returns their paths.
+
+    Each part is named after the shape and size and loads into its own table; files
+    already in data_dir are reused.
+    '''
+    name = f'{shape}_{rows}'
+    paths = dataset_paths(data_dir, name, parts)
+    if all(path.exists() for path in paths):
+        return [str(path) for path in paths]
+    if shape == 'wide':
+        return generate_customers(data_dir, rows, parts, name, seed,
+                                  extra_columns=WIDE_EXTRA_COLUMNS)
+    return generate_customers(data_dir, rows, parts, name, seed, columns=NARROW_COLUMNS)
+
+def run_strategy(strategy: str, csv_files: List[str], db_settings: dict, batch_size: int,
+                 workers: int) -> dict:
+    '''Loads the files with one strategy and measures it; runs in a fresh process.'''
+    # Imported here so the parent process never touches the driver or loads any data
+    from src.backends import BackendLoader, create_backend
+    from src.store_data import CSVToMySQLLoader, MySQLDatabaseManager, load_csv_to_db_parallel
+
+    options = dict(STRATEGIES[strategy], batch_size=batch_size)
+    start = time.perf_counter()
+    if 'backend' in options:
+        # A fresh database file next to the dataset, removed once measured
+        path = Path(csv_files[0]).parent / f'benchmark.{options["backend"]}'
+        backend = create_backend(options['backend'], path)
+        if not backend.connect():
+            return {'strategy': strategy, 'status': 'failed'}
+        results = BackendLoader(backend, csv_files).load_csv_to_db()
+        backend.close()
+        for database_file in path.parent.glob(f'{path.name}*'):
+            database_file.unlink()
+    elif strategy == 'parallel':
+        results = load_csv_to_db_parallel(db_settings, csv_files, workers, **options)
+    else:
+        db_manager = MySQLDatabaseManager(
+            **db_settings, allow_local_infile=options['engine'] == 'infile'
+        )
+        if not db_manager.is_connected():
+            return {'strategy': strategy, 'status': 'failed'}
+        results = CSVToMySQLLoader(db_manager, csv_files, **options).load_csv_to_db()
+        db_manager.close()
+    seconds = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rows = sum(result['rows'] for result in results)
+    return {
+        'strategy': strategy,
+        'status': 'loaded' if all(r['status'] == 'loaded' for r in results) else 'failed',
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else 0.0,
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'peak_rss_mb': round(peak_rss_bytes(usage) / 2**20, 1)
+    }
+
+def peak_rss_bytes(usage: resource.struct_rusage) -> int:
+    '''Returns the peak resident set size; Linux reports it in KiB, macOS in bytes.'''
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+def drop_tables(db_settings: dict, csv_files: List[str]) -> None:
+    '''Drops the tables a run created, so the next one starts from an empty schema.'''
+    from src.store_data import MySQLDatabaseManager
+
+    db_manager = MySQLDatabaseManager(**db_settings)
+    if db_manager.is_connected():
+        for csv_file in csv_files:
+            db_manager.drop_table(get_table_name(csv_file))
+        db_manager.close()
+
+def create_database(db_settings: dict) -> bool:
+    '''Creates the benchmark database if the server does not have it yet.'''
+    import mysql.connector
+    from mysql.connector import Error
+
+    settings = {key: value for key, value in db_settings.items() if key != 'database'}
+    try:
+        connection = mysql.connector.connect(**settings)
+        cursor = connection.cursor()
+        cursor.execute(f'CREATE DATABASE IF NOT EXISTS `{db_settings["database"]}`')
+        cursor.close()
+        connection.close()
+        return True
+    except Error as e:
+        logger.error(f'Error creating the benchmark database: {e}')
+        return False
+
+def run_benchmark(db_settings: dict, data_dir: Path, sizes: List[int], shapes: List[str],
+                  strategies: List[str], batch_size: int = 5000,
+                  workers: int = BENCHMARK_WORKERS, repeat: int = 1,
+                  seed: int = 0) -> List[dict]:
+    '''Runs every strategy on every dataset and returns the fastest run of each.
+
+    Each run loads the dataset from scratch in its own spawned process, so peak RSS and
+    CPU time (client side only) belong to that run alone. Every dataset is split into
+    workers parts for all strategies, which gives the parallel loader files to spread
+    while the others load the same parts one after another. The MySQL database is only
+    needed when a MySQL strategy is run.
+    '''
+    uses_mysql = any('backend' not in STRATEGIES[strategy] for strategy in strategies)
+    if uses_mysql and not create_database(db_settings):
+        return []
+    context = get_context('spawn')
+    results = []
+    for shape in shapes:
+        for rows in sizes:
+            csv_files = generate_dataset(data_dir, rows, shape, workers, seed)
+            for strategy in strategies:
+                runs = []
+                for _ in range(repeat):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        run = executor.submit(
+                            run_strategy, strategy, csv_files, db_settings, batch_size, workers
+                        ).result()
+                    if 'backend' not in STRATEGIES[strategy]:
+                        drop_tables(db_settings, csv_files)
+                    runs.append(run)
+                    if run['status'] != 'loaded':
+                        break
+                best = min(runs, key=lambda run: (run['status'] != 'loaded', run.get('seconds', 0)))
+                results.append({'shape': shape, 'dataset_rows': rows, **best})
+                logger.info(f'{shape} {rows:,} rows, {strategy}: {best}')
+    return results
+
+def log_results_table(results: List[dict]) -> None:
+    '''Logs the results as a fixed-width table.'''
+    logger.info(
+        f'{"shape":<7} {"rows":>11} {"strategy":<12} {"status":<7} {"rows/s":>12} '
+        f'{"seconds":>9} {"cpu s":>9} {"peak MiB":>9}'
+    )
+    for result in results:
+        logger.info(
+            f'{result["shape"]:<7} {result["dataset_rows"]:>11,} {result["strategy"]:<12} '
+            f'{result["status"]:<7} {result.get("rows_per_second", 0):>12,.0f} '
+            f'{result.get("seconds", 0):>9.2f} {result.get("cpu_seconds", 0):>9.2f} '
+            f'{result.get("peak_rss_mb", 0):>9.1f}'
+        )
+
+def write_results(results: List[dict], settings: dict,
+                  reports_dir: Path = REPORTS_DIR / 'benchmarks') -> Path:
+    '''Writes the settings and results to reports/benchmarks/benchmark_<timestamp>.json.'''
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    started_at = datetime.now(timezone.utc)
+    report_path = reports_dir / f'benchmark_{started_at.strftime("%Y%m%dT%H%M%SZ")}.json'
+    with open(report_path, 'w') as f:
+        json.dump({'created_at': started_at.isoformat(), 'settings': settings,
+                   'results': results}, f, indent=2)
+    return report_path
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    '''Parses the command line.'''
+    parser = argparse.ArgumentParser(
+        description='Benchmark the CSV insert strategies against a local stand-in database.'
+    )
+    parser.add_argument('--rows', type=int, nargs='+', default=list(BENCHMARK_ROWS),
+                        help='dataset sizes in rows (e.g. 10000 1000000 10000000)')
+    parser.add_argument('--shape', nargs='+', choices=['narrow', 'wide'], default=['narrow'],
+                        help=f'narrow ({len(NARROW_COLUMNS)} columns) and/or wide (17 customer '
+                             f'and {WIDE_EXTRA_COLUMNS} feature columns)')
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES),
+                        default=list(STRATEGIES))
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=BENCHMARK_WORKERS,
+                        help='files each dataset is split into and parallel loader threads')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', type=Path,
+                        help='where to write and reuse the datasets (default: a temp dir)')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    '''Main entry point for the script.'''
+    configure_logging(__file__)  # Set up logging at the start of the program
+    args = parse_args(argv)
+
+    # Runs are measured by the benchmark itself; keep the loader's own reporting and
+    # change tracking out of the timings. Spawned runs inherit these.
+    os.environ.update({
+        'LOAD_METRICS': 'false', 'INCREMENTAL_LOAD': 'false', 'LOAD_MODE': 'replace',
+        'PARQUET_CACHE': 'false', 'RESUMABLE_LOAD': 'false'
+    })
+
+    # Database connection settings
+    db_settings = {
+        'host': BENCHMARK_MYSQL_HOST,
+        'user': BENCHMARK_MYSQL_USERNAME,
+        'password': BENCHMARK_MYSQL_PASSWORD,
+        'database': BENCHMARK_MYSQL_DATABASE
+    }
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as tmp_dir:
+        results = run_benchmark(
+            db_settings, args.data_dir or Path(tmp_dir), args.rows, args.shape,
+            args.strategies, args.batch_size, args.workers, args.repeat, args.seed
+        )
+    if not results:
+        return
+    log_results_table(results)
+    settings = {key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()}
+    report_path = write_results(results, settings)
+    logger.info(f'Benchmark results written to "{report_path}".')
+
+
+if __name__ == '__main__':
+    main()
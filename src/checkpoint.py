@@ -0,0 +1,83 @@
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+from mysql.connector import Error
+
+# Table holding the progress of every load that has not finished yet
+CHECKPOINT_TABLE = 'load_checkpoints'
+
+
+class LoadCheckpoints:
+    def __init__(self, db_manager: Any, table_name: str = CHECKPOINT_TABLE) -> None:
+        '''Tracks the rows of each file committed so far, in a table next to the data.
+
+        A checkpoint is written on the same connection and in the same transaction as the
+        chunk it covers, so after a crash it never claims rows that were rolled back and
+        never misses rows that were committed. Entries are keyed by the SHA-256 of the
+        absolute file path and hold the file's content hash, the target table, the rows
+        committed and the id of the last committed chunk.
+        '''
+        self.db_manager = db_manager
+        self.table_name = table_name
+        self.db_manager.create_table(
+            table_name,
+            '`file_key` CHAR(64) NOT NULL PRIMARY KEY, `file_path` VARCHAR(1024) NOT NULL, '
+            '`file_sha256` CHAR(64) NOT NULL, `target_table` VARCHAR(64) NOT NULL, '
+            '`rows_committed` BIGINT UNSIGNED NOT NULL, `batch_id` INT UNSIGNED NOT NULL, '
+            '`updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP '
+            'ON UPDATE CURRENT_TIMESTAMP'
+        )
+
+    def get(self, file_path: str) -> Optional[dict]:
+        '''Returns the checkpoint of an unfinished load of the file, if any.'''
+        try:
+            with self.db_manager.get_connection() as connection:
+                cursor = connection.cursor(buffered=True, dictionary=True)
+                cursor.execute(
+                    f'SELECT file_sha256, target_table, rows_committed, batch_id '
+                    f'FROM {self.table_name} WHERE file_key = %s',
+                    (file_key(file_path),)
+                )
+                checkpoint = cursor.fetchone()
+                cursor.close()
+            return checkpoint
+        except Error as e:
+            logger.error(f'Error reading the checkpoint of "{file_path}": {e}')
+            return None
+
+    def record(self, file_path: str, sha256: str, target_table: str, rows_committed: int,
+               batch_id: int) -> None:
+        '''Writes the checkpoint without committing; call it inside the chunk's transaction.'''
+        with self.db_manager.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f'INSERT INTO {self.table_name} '
+                f'(file_key, file_path, file_sha256, target_table, rows_committed, batch_id) '
+                f'VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE '
+                f'file_path = VALUES(file_path), file_sha256 = VALUES(file_sha256), '
+                f'target_table = VALUES(target_table), '
+                f'rows_committed = VALUES(rows_committed), batch_id = VALUES(batch_id)',
+                (file_key(file_path), str(Path(file_path).resolve()), sha256, target_table,
+                 rows_committed, batch_id)
+            )
+            cursor.close()
+
+    def forget(self, file_path: str) -> None:
+        '''Drops the checkpoint of a file once its load has finished or cannot be resumed.'''
+        try:
+            with self.db_manager.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    f'DELETE FROM {self.table_name} WHERE file_key = %s', (file_key(file_path),)
+                )
+                connection.commit()
+                cursor.close()
+        except Error as e:
+            logger.error(f'Error clearing the checkpoint of "{file_path}": {e}')
+
+
+def file_key(file_path: str) -> str:
+    '''Returns the fixed-length key of a file path.'''
+    return hashlib.sha256(str(Path(file_path).resolve()).encode()).hexdigest()
@@ -0,0 +1,81 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+import pyarrow as pa
+
+# File suffixes of the compressed CSVs the loader reads and their codecs
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+# Bytes read from the decompressor at a time when copying
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def compression(file_path: Union[Path, str]) -> Optional[str]:
+    '''Returns the codec a file is compressed with, judged by its suffix, or None.'''
+    return COMPRESSIONS.get(Path(file_path).suffix.lower())
+
+def strip_compression(file_name: str) -> str:
+    '''Returns the file name without its compression suffix, if it has one.'''
+    suffix = Path(file_name).suffix
+    return file_name[:-len(suffix)] if compression(file_name) else file_name
+
+def csv_stem(file_path: Union[Path, str]) -> str:
+    '''Returns the file name without its compression suffix and extension.
+
+    "customers_dataset.csv.gz" and "customers_dataset.csv" both give "customers_dataset".
+    '''
+    return Path(strip_compression(Path(file_path).name)).stem
+
+def open_compressed(file_path: Union[Path, str]) -> BinaryIO:
+    '''Opens a compressed file as a binary stream that decompresses while it is read.'''
+    codec = compression(file_path)
+    if codec == 'gzip':
+        return gzip.open(file_path, 'rb')
+    if codec == 'bz2':
+        return bz2.open(file_path, 'rb')
+    if codec == 'xz':
+        return lzma.open(file_path, 'rb')
+    if codec == 'zstd':
+        # The standard library has no zstd before Python 3.14; pyarrow ships the codec
+        if not pa.Codec.is_available('zstd'):
+            raise ValueError(f'Cannot read "{file_path}": this pyarrow build has no zstd codec.')
+        return pa.input_stream(str(file_path), compression='zstd')
+    raise ValueError(f'"{file_path}" is not a compressed file.')
+
+@contextmanager
+def open_csv(file_path: Union[Path, str]) -> Iterator[Union[str, BinaryIO]]:
+    '''Yields what a CSV reader should be given for the file.
+
+    A plain CSV is passed on as its path, so readers keep their own fast file access; a
+    compressed one is opened as a decompressing stream and closed afterwards. pandas and
+    pyarrow read either, chunk by chunk, so a compressed file is never unpacked on disk.
+    '''
+    if compression(file_path) is None:
+        yield str(file_path)
+        return
+    with open_compressed(file_path) as stream:
+        yield stream
+
+@contextmanager
+def decompressed_copy(file_path: Union[Path, str]) -> Iterator[str]:
+    '''Yields the path of a plain copy of a compressed file, deleted afterwards.
+
+    For readers that need a real file, like LOAD DATA LOCAL INFILE. The copy goes to the
+    temp directory (TMPDIR); a plain CSV is yielded as is.
+    '''
+    if compression(file_path) is None:
+        yield str(file_path)
+        return
+    fd, temp_path = tempfile.mkstemp(prefix=f'{csv_stem(file_path)}_', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'wb') as target, open_compressed(file_path) as source:
+            shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+        yield temp_path
+    finally:
+        Path(temp_path).unlink(missing_ok=True)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -15,6 +16,7 @@ RAW_DATA_DIR = DATA_DIR / "raw"
 INTERIM_DATA_DIR = DATA_DIR / "interim"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 EXTERNAL_DATA_DIR = DATA_DIR / "external"
+LOAD_MANIFEST_FILE = DATA_DIR / "load_manifest.json"
 
 LOGS_DIR = PROJ_ROOT / "logs"
 LOGS_DATA_DIR = LOGS_DIR / "logs_data"
@@ -24,6 +26,15 @@ MODELS_DIR = PROJ_ROOT / "models"
 REPORTS_DIR = PROJ_ROOT / "reports"
 FIGURES_DIR = REPORTS_DIR / "figures"
 
+REFERENCES_DIR = PROJ_ROOT / "references"
+SCHEMA_OVERRIDES_FILE = REFERENCES_DIR / "schema_overrides.json"
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Reads an on/off setting from the environment; 1, true and yes mean on."""
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
 # If tqdm is installed, configure loguru with tqdm.write
 # https://github.com/Delgan/loguru/issues/135
 try:
@@ -0,0 +1,107 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Suffix of the side table holding the last loaded hash of every row
+ROW_HASHES_SUFFIX = '__row_hashes'
+# Joins the fields of a row in its hashed form, and stands in there for a missing value
+FIELD_SEPARATOR = '\x1f'
+NULL_MARKER = '\x00'
+
+
+def hash_table_name(table_name: str) -> str:
+    '''Returns the name of the side table storing row hashes for the table.'''
+    return f'{table_name}{ROW_HASHES_SUFFIX}'
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    '''Returns a 64-bit hash of every row, computed column-wise without a Python loop.
+
+    Rows are hashed in a canonical text form (see canonical_strings), so a row hashes the
+    same whichever dtypes pandas gave its chunk.
+    '''
+    columns = [canonical_strings(df.iloc[:, i]) for i in range(df.shape[1])]
+    text = columns[0].str.cat(columns[1:], sep=FIELD_SEPARATOR)
+    return pd.util.hash_pandas_object(text, index=False)
+
+def canonical_strings(series: pd.Series) -> pd.Series:
+    '''Renders a column as text that does not depend on its dtype.
+
+    An integer reads the same from an int64 column as from the float64 one a missing
+    value turns it into, timestamps are written out in full and missing values of any
+    kind become NULL_MARKER.
+    '''
+    nulls = series.isna().to_numpy(dtype=bool)
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f').to_numpy(dtype=object)
+    elif pd.api.types.is_float_dtype(dtype):
+        numbers = series.to_numpy(dtype=float, na_value=np.nan)
+        whole = np.isfinite(numbers) & (np.mod(numbers, 1) == 0) & (np.abs(numbers) < 2**63)
+        values = numbers.astype(str).astype(object)
+        values[whole] = numbers[whole].astype(np.int64).astype(str)
+    else:
+        values = series.astype(str).to_numpy(dtype=object, copy=True)
+    values[nulls] = NULL_MARKER
+    return pd.Series(values, index=series.index, dtype=object)
+
+def key_strings(series: pd.Series, kind: Optional[str] = None) -> pd.Series:
+    '''Renders key values as text that is the same whether read from the CSV or from MySQL.
+
+    kind is the kind of the key column in the table (see schema.type_kind): MySQL returns
+    a DATE key as 2024-01-15 and a DECIMAL one as 1.50, which the CSV may hold as a parsed
+    timestamp or as 1.5.
+    '''
+    if kind in ('date', 'datetime'):
+        dates = pd.to_datetime(series)
+        return dates.dt.strftime('%Y-%m-%d' if kind == 'date' else '%Y-%m-%d %H:%M:%S.%f')
+    if kind == 'decimal':
+        return series.map(lambda value: format(Decimal(str(value)).normalize(), 'f'))
+    if kind == 'boolean' or pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype(int).astype(str)
+    return series.astype(str)
+
+def key_index(df: pd.DataFrame, key_columns: List[str],
+              key_kinds: Optional[Dict[str, str]] = None) -> pd.Index:
+    '''Builds an index of the key values as strings so CSV and database keys compare equal.'''
+    key_kinds = key_kinds or {}
+    keys = pd.DataFrame(
+        {column: key_strings(df[column], key_kinds.get(column)) for column in key_columns}
+    )
+    if len(key_columns) == 1:
+        return pd.Index(keys[key_columns[0]])
+    return pd.MultiIndex.from_frame(keys)
+
+def stored_hashes(hashes: pd.DataFrame, key_columns: List[str],
+                  key_kinds: Optional[Dict[str, str]] = None) -> pd.Series:
+    '''Indexes the stored row_hash column by key for lookups.'''
+    return pd.Series(
+        hashes['row_hash'].astype('uint64').to_numpy(),
+        index=key_index(hashes, key_columns, key_kinds)
+    )
+
+def changed_rows(chunk: pd.DataFrame, key_columns: List[str], stored: pd.Series,
+                 key_kinds: Optional[Dict[str, str]] = None
+                 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Index]:
+    '''Splits out the rows of a chunk that are new or differ from their stored hash.
+
+    Returns the changed rows, their keys with the new hashes (to be written back to the
+    side table), and the keys of every row in the chunk.
+    '''
+    hashes = row_hashes(chunk).to_numpy()
+    keys = key_index(chunk, key_columns, key_kinds)
+    # 0 marks a key that has no stored hash; a real row hashing to 0 is vanishingly unlikely
+    previous = stored.reindex(keys, fill_value=0).to_numpy()
+    changed = previous != hashes
+    changed_hashes = chunk.loc[changed, key_columns].copy()
+    changed_hashes['row_hash'] = hashes[changed]
+    return chunk.loc[changed], changed_hashes, keys
+
+def deleted_keys(stored: pd.Series, seen_keys: pd.Index,
+                 key_columns: List[str]) -> List[tuple]:
+    '''Returns the stored keys that no longer appear in the file.'''
+    missing = stored.index.difference(seen_keys)
+    if len(key_columns) == 1:
+        return [(key,) for key in missing]
+    return list(missing)
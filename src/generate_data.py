@@ -0,0 +1,273 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from loguru import logger
+
+from logs.log_config import configure_logging
+from src.config import EXTERNAL_DATA_DIR
+
+# Constants
+GENERATE_CHUNK_ROWS = int(os.environ.get('GENERATE_CHUNK_ROWS', 500_000))
+GENERATE_WORKERS = int(os.environ.get('GENERATE_WORKERS', os.cpu_count() or 1))
+GENERATE_NULL_RATE = float(os.environ.get('GENERATE_NULL_RATE', 0.02))
+# Dates are drawn up to this day, so a seed gives the same file whenever it runs
+END_DATE = np.datetime64('2024-12-31')
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Michael', 'Patricia', 'John', 'Jennifer', 'Robert', 'Linda', 'David',
+    'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas',
+    'Sarah', 'Carlos', 'Maria', 'Wei', 'Fatima', 'Mohammed', 'Aisha', 'Hiroshi', 'Yuki',
+    'Lukas', 'Emma', 'Olivia', 'Noah', 'Liam', 'Sofia', 'Mateo', 'Chloe', 'Arjun', 'Priya',
+    'Ivan', 'Anna', 'Pierre', 'Camille'
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas',
+    'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White', 'Harris',
+    'Clark', 'Lewis', 'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Nguyen', 'Kim',
+    'Chen', 'Patel', 'Singh', 'Muller', 'Schmidt', 'Dubois', 'Rossi', 'Silva', 'Tanaka'
+]
+STREET_NAMES = [
+    'Main', 'Oak', 'Pine', 'Maple', 'Cedar', 'Elm', 'Washington', 'Lake', 'Hill', 'Park',
+    'Church', 'High', 'Station', 'Mill', 'River', 'Sunset', 'Highland', 'Forest', 'Meadow',
+    'Victoria'
+]
+STREET_SUFFIXES = ['St', 'Ave', 'Rd', 'Blvd', 'Ln', 'Dr', 'Way', 'Ct']
+# Domain and share of customers using it
+EMAIL_DOMAINS = {
+    'gmail.com': 0.45, 'yahoo.com': 0.15, 'outlook.com': 0.12, 'hotmail.com': 0.1,
+    'icloud.com': 0.08, 'aol.com': 0.03, 'example.com': 0.07
+}
+# Country, share of customers and its cities
+COUNTRIES = {
+    'United States': (0.42, ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix',
+                             'Seattle', 'Boston', 'Denver', 'Atlanta', 'Miami']),
+    'United Kingdom': (0.12, ['London', 'Manchester', 'Birmingham', 'Leeds', 'Glasgow']),
+    'Germany': (0.1, ['Berlin', 'Hamburg', 'Munich', 'Cologne', 'Frankfurt']),
+    'India': (0.09, ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Hyderabad']),
+    'Canada': (0.07, ['Toronto', 'Montreal', 'Vancouver', 'Calgary']),
+    'France': (0.06, ['Paris', 'Lyon', 'Marseille', 'Toulouse']),
+    'Brazil': (0.05, ['Sao Paulo', 'Rio de Janeiro', 'Brasilia']),
+    'Australia': (0.04, ['Sydney', 'Melbourne', 'Brisbane', 'Perth']),
+    'Japan': (0.03, ['Tokyo', 'Osaka', 'Yokohama']),
+    'Mexico': (0.02, ['Mexico City', 'Guadalajara', 'Monterrey'])
+}
+GENDERS = {'Female': 0.49, 'Male': 0.48, 'Non-binary': 0.03}
+SEGMENTS = {'Consumer': 0.52, 'Corporate': 0.3, 'Home Office': 0.18}
+LOYALTY_TIERS = {'Bronze': 0.6, 'Silver': 0.25, 'Gold': 0.11, 'Platinum': 0.04}
+# Never null: the key and the date every customer has
+REQUIRED_COLUMNS = {'customer_id', 'signup_date'}
+
+
+def customer_table(first_id: int, rows: int, seed: int = 0,
+                   null_rate: float = GENERATE_NULL_RATE,
+                   columns: Optional[Sequence[str]] = None, extra_columns: int = 0) -> pa.Table:
+    '''Generates rows customers with ids from first_id as an Arrow table.
+
+    Every value is drawn with NumPy and every string is assembled with Arrow compute
+    kernels, so no Python code runs per row. The random stream depends only on the seed
+    and first_id, so a chunk comes out the same whichever thread or file it is made in.
+    Categoricals follow skewed shares (most customers in a few countries, most on the
+    Bronze tier), spend follows the number of orders, and each column other than the id
+    and sign-up date is null in about null_rate of the rows. extra_columns adds that many
+    feature_<n> float columns, for wide test tables.
+    '''
+    rng = np.random.default_rng([seed, first_id])
+    ids = np.arange(first_id, first_id + rows, dtype=np.int64)
+
+    first = rng.choice(len(FIRST_NAMES), rows, p=zipf_shares(len(FIRST_NAMES)))
+    last = rng.choice(len(LAST_NAMES), rows, p=zipf_shares(len(LAST_NAMES)))
+    first_names = take(FIRST_NAMES, first)
+    last_names = take(LAST_NAMES, last)
+    email = pc.binary_join_element_wise(
+        take([name.lower() for name in FIRST_NAMES], first), '.',
+        take([name.lower() for name in LAST_NAMES], last), pc.cast(pa.array(ids), pa.string()),
+        '@', take(list(EMAIL_DOMAINS), pick(rng, EMAIL_DOMAINS, rows)), ''
+    )
+    phone = pc.binary_join_element_wise(
+        padded(rng.integers(200, 1000, rows), 3), padded(rng.integers(0, 1000, rows), 3),
+        padded(rng.integers(0, 10000, rows), 4), '-'
+    )
+    street_address = pc.binary_join_element_wise(
+        pc.cast(pa.array(rng.integers(1, 10000, rows)), pa.string()),
+        take(STREET_NAMES, rng.integers(0, len(STREET_NAMES), rows)),
+        take(STREET_SUFFIXES, rng.integers(0, len(STREET_SUFFIXES), rows)), ' '
+    )
+
+    country = pick(rng, {name: share for name, (share, _) in COUNTRIES.items()}, rows)
+    # Cities of every country in one list; each row picks among its own country's slice
+    city_names = [city for _, cities in COUNTRIES.values() for city in cities]
+    city_counts = np.array([len(cities) for _, cities in COUNTRIES.values()])
+    city_offsets = np.concatenate([[0], np.cumsum(city_counts)[:-1]])
+    city = city_offsets[country] + (rng.random(rows) * city_counts[country]).astype(np.int64)
+
+    # Ages cluster around the late thirties; signup and last purchase are ordered in time
+    age_days = np.clip(rng.normal(38, 13, rows), 18, 90) * 365.25
+    birth_date = END_DATE - age_days.astype('timedelta64[D]')
+    signup_date = END_DATE - rng.integers(0, 10 * 365, rows).astype('timedelta64[D]')
+    since_signup = (END_DATE - signup_date).astype(np.int64) + 1
+    last_purchase_date = signup_date + (rng.random(rows) * since_signup).astype('timedelta64[D]')
+
+    # A long tail of heavy buyers: orders are negative binomial, spend per order lognormal
+    total_orders = rng.negative_binomial(1.2, 0.12, rows)
+    total_spend = np.round(total_orders * rng.lognormal(3.8, 0.6, rows), 2)
+
+    data = {
+        'customer_id': pa.array(ids),
+        'first_name': first_names,
+        'last_name': last_names,
+        'gender': take(list(GENDERS), pick(rng, GENDERS, rows)),
+        'email': email,
+        'phone': phone,
+        'street_address': street_address,
+        'city': take(city_names, city),
+        'postal_code': padded(rng.integers(0, 100000, rows), 5),
+        'country': take(list(COUNTRIES), country),
+        'birth_date': pa.array(birth_date),
+        'signup_date': pa.array(signup_date),
+        'last_purchase_date': pa.array(last_purchase_date),
+        'segment': take(list(SEGMENTS), pick(rng, SEGMENTS, rows)),
+        'loyalty_tier': take(list(LOYALTY_TIERS), pick(rng, LOYALTY_TIERS, rows)),
+        'total_orders': pa.array(total_orders),
+        'total_spend': pa.array(total_spend)
+    }
+    for i in range(extra_columns):
+        data[f'feature_{i}'] = pa.array(np.round(rng.normal(0, 1, rows), 4))
+    if columns is not None:
+        data = {name: data[name] for name in columns}
+    if null_rate > 0:
+        for name, values in data.items():
+            if name not in REQUIRED_COLUMNS:
+                nulls = pa.array(rng.random(rows) < null_rate)
+                data[name] = pc.if_else(nulls, pa.scalar(None, values.type), values)
+    return pa.table(data)
+
+def zipf_shares(count: int, exponent: float = 1.0) -> np.ndarray:
+    '''Returns the skewed shares of count ranked values, the first the most common.'''
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+def pick(rng: np.random.Generator, shares: dict, rows: int) -> np.ndarray:
+    '''Draws rows indices into the keys of shares, weighted by their values.'''
+    weights = np.array(list(shares.values()), dtype=float)
+    return rng.choice(len(weights), rows, p=weights / weights.sum())
+
+def take(values: List[str], indices: np.ndarray) -> pa.Array:
+    '''Returns the strings at the indices.'''
+    return pa.array(values, pa.string()).take(pa.array(indices))
+
+def padded(numbers: np.ndarray, width: int) -> pa.Array:
+    '''Formats the numbers as zero-padded strings of the width.'''
+    return pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width=width, padding='0')
+
+def write_customers(path: Path, rows: int, seed: int = 0, first_id: int = 1,
+                    null_rate: float = GENERATE_NULL_RATE,
+                    columns: Optional[Sequence[str]] = None, extra_columns: int = 0,
+                    chunk_rows: int = GENERATE_CHUNK_ROWS,
+                    workers: int = GENERATE_WORKERS) -> int:
+    '''Writes rows customers with ids from first_id to a CSV file; returns its size in bytes.
+
+    Chunks are generated and serialized to CSV on worker threads (NumPy and Arrow
+    release the GIL) and appended in order, with at most workers chunks in memory. The
+    file is written under a temporary name and renamed when complete.
+    '''
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    # A header-only file when there are no rows
+    starts = range(first_id, first_id + rows, chunk_rows) if rows else [first_id]
+
+    def generate(start: int) -> pa.Buffer:
+        size = min(chunk_rows, first_id + rows - start)
+        table = customer_table(start, size, seed, null_rate, columns, extra_columns)
+        sink = pa.BufferOutputStream()
+        pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=start == first_id))
+        return sink.getvalue()
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor, \
+            open(tmp_path, 'wb') as f:
+        pending = deque()
+        for start in starts:
+            pending.append(executor.submit(generate, start))
+            if len(pending) > workers:
+                f.write(pending.popleft().result())
+        while pending:
+            f.write(pending.popleft().result())
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+def generate_customers(output_dir: Path = EXTERNAL_DATA_DIR, rows: int = 1_000_000,
+                       files: int = 1, name: str = 'customers', seed: int = 0,
+                       null_rate: float = GENERATE_NULL_RATE,
+                       columns: Optional[Sequence[str]] = None, extra_columns: int = 0,
+                       chunk_rows: int = GENERATE_CHUNK_ROWS,
+                       workers: int = GENERATE_WORKERS) -> List[str]:
+    '''Writes a customer dataset split into files and returns their paths.
+
+    One file is named <name>_dataset.csv and several <name>_p<n>_dataset.csv, so the
+    loader puts each in its own table. Customer ids run on across the files.
+    '''
+    paths = dataset_paths(output_dir, name, files)
+    start = time.perf_counter()
+    first_id = 1
+    data_bytes = 0
+    for part, path in enumerate(paths):
+        part_rows = rows // files + (1 if part < rows % files else 0)
+        data_bytes += write_customers(path, part_rows, seed, first_id, null_rate, columns,
+                                      extra_columns, chunk_rows, workers)
+        first_id += part_rows
+    seconds = time.perf_counter() - start
+    logger.info(
+        f'Generated {rows:,} customers in {len(paths)} file(s) under "{output_dir}": '
+        f'{data_bytes / 2**20:,.0f} MiB in {seconds:.1f}s '
+        f'({data_bytes / 2**20 / seconds if seconds else 0:,.0f} MiB/s).'
+    )
+    return [str(path) for path in paths]
+
+def dataset_paths(output_dir: Path, name: str, files: int = 1) -> List[Path]:
+    '''Returns the paths generate_customers writes the dataset to.'''
+    if files == 1:
+        return [output_dir / f'{name}_dataset.csv']
+    return [output_dir / f'{name}_p{part}_dataset.csv' for part in range(files)]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    '''Parses the command line.'''
+    parser = argparse.ArgumentParser(description='Generate a synthetic customer dataset.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--files', type=int, default=1, help='files to split the rows into')
+    parser.add_argument('--name', default='customers', help='table name of the files')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--null-rate', type=float, default=GENERATE_NULL_RATE)
+    parser.add_argument('--extra-columns', type=int, default=0,
+                        help='extra float feature columns, for wide tables')
+    parser.add_argument('--chunk-rows', type=int, default=GENERATE_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=GENERATE_WORKERS)
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--output-dir', type=Path, default=EXTERNAL_DATA_DIR)
+    output.add_argument('--temp', action='store_true',
+                        help='write to a new temporary directory instead')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    '''Main entry point for the script.'''
+    configure_logging(__file__)  # Set up logging at the start of the program
+    args = parse_args(argv)
+
+    output_dir = Path(tempfile.mkdtemp(prefix='customers_')) if args.temp else args.output_dir
+    generate_customers(
+        output_dir, args.rows, args.files, args.name, args.seed, args.null_rate,
+        extra_columns=args.extra_columns, chunk_rows=args.chunk_rows, workers=args.workers
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.arrow_csv import batch_rows, read_csv_batches
+from src.compressed_csv import open_csv
+from src.loading import CSV_ERRORS, infer_table_schema, log_csv_error
+from src.metrics import stage_timer, timed_iter
+from src.schema import SCHEMA_SAMPLE_ROWS, TableSchema, csv_dtypes
+
+if TYPE_CHECKING:
+    from src.store_data import CSVToMySQLLoader
+
+
+def load_csv_arrow(loader: 'CSVToMySQLLoader', file_path: str, table_name: str,
+                   target_table: Optional[str] = None
+                   ) -> Tuple[Optional[int], Optional[TableSchema]]:
+    '''Parses the CSV file with pyarrow, typed by the sampled schema, and inserts its batches.'''
+    target_table = target_table or table_name
+    try:
+        dtypes = csv_dtypes(file_path)
+        with open_csv(file_path) as source:
+            sample = pd.read_csv(source, nrows=SCHEMA_SAMPLE_ROWS, dtype=dtypes)
+    except CSV_ERRORS as e:
+        log_csv_error(file_path, e)
+        return None, None
+    schema = infer_table_schema(sample, table_name, loader.schema_overrides, sample=True)
+    loader.db_manager.create_table(target_table, schema.definition())
+    rows = 0
+    try:
+        if loader.parquet_cache:
+            batches = loader.parquet_cache.iter_batches(
+                file_path, loader.chunksize or loader.batch_size
+            )
+        else:
+            batches = read_csv_batches(file_path, schema, loader.chunksize)
+        for batch in timed_iter(batches, loader.file_metrics):
+            with stage_timer(loader.file_metrics, 'convert'):
+                rows_batch = batch_rows(batch)
+            inserted = loader.db_manager.insert_rows(
+                target_table, schema.column_names, rows_batch, loader.insert_method,
+                loader.batch_size
+            )
+            if inserted is None:
+                return None, schema
+            rows += inserted
+    except (OSError, ValueError) as e:
+        # pyarrow reports malformed rows and values that do not fit their type as ArrowInvalid
+        logger.error(f'Error parsing CSV file "{file_path}" after {rows} rows: {e}')
+        return None, schema
+    logger.info(f'Loaded {rows} rows from "{file_path}" with pyarrow.')
+    return rows, schema
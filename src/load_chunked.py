@@ -0,0 +1,116 @@
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+from mysql.connector import Error
+
+from src.loading import CSV_ERRORS, infer_table_schema, log_csv_error
+from src.manifest import file_hash
+from src.metrics import stage_timer
+from src.retry import call_with_retries
+from src.rows import frame_rows
+from src.schema import TableSchema
+
+if TYPE_CHECKING:
+    from src.store_data import CSVToMySQLLoader
+
+# Rows per chunk of a resumable load when no chunksize is set
+CHECKPOINT_CHUNKSIZE = 100_000
+
+
+def load_csv_chunked(loader: 'CSVToMySQLLoader', file_path: str, table_name: str,
+                     target_table: Optional[str] = None, checkpoint: Optional[dict] = None
+                     ) -> Tuple[Optional[int], Optional[TableSchema]]:
+    '''Streams the CSV file into the table chunk by chunk, after the rows checkpoint committed.'''
+    target_table = target_table or table_name
+    chunksize = loader.chunksize or CHECKPOINT_CHUNKSIZE
+    rows = checkpoint['rows_committed'] if checkpoint else 0
+    batch_id = checkpoint['batch_id'] if checkpoint else 0
+    schema = None
+    try:
+        if rows:
+            # Infer from the same first chunk as the interrupted load, so the types match
+            head = loader.iter_csv_chunks(file_path, chunksize)
+            first_chunk = next(head)
+            head.close()
+            schema = infer_table_schema(
+                first_chunk, table_name, loader.schema_overrides, sample=True
+            )
+        for chunk in loader.iter_csv_chunks(file_path, chunksize, skip_rows=rows):
+            if schema is None:
+                schema = infer_table_schema(
+                    chunk, table_name, loader.schema_overrides, sample=True
+                )
+                loader.db_manager.create_table(target_table, schema.definition())
+            chunk = schema.coerce(chunk)
+            if checkpoint is None:
+                inserted = loader.db_manager.insert_data(
+                    target_table, chunk, loader.insert_method, loader.batch_size, schema=schema
+                )
+            else:
+                batch_id += 1
+                inserted = commit_chunk(
+                    loader, file_path, target_table, chunk, schema, checkpoint['file_sha256'],
+                    rows + len(chunk), batch_id
+                )
+            if inserted is None:
+                return None, schema
+            rows += inserted
+    except CSV_ERRORS as e:
+        log_csv_error(file_path, e, rows)
+        return None, schema
+    logger.info(f'Streamed {rows} rows from "{file_path}".')
+    return rows, schema
+
+def commit_chunk(loader: 'CSVToMySQLLoader', file_path: str, target_table: str,
+                 chunk: pd.DataFrame, schema: TableSchema, sha256: str, rows_committed: int,
+                 batch_id: int) -> Optional[int]:
+    '''Writes a chunk and its checkpoint in one transaction and returns the rows written.'''
+    with stage_timer(loader.file_metrics, 'convert'):
+        rows = frame_rows(chunk, schema, loader.db_manager.row_buffer())
+
+    def write() -> None:
+        with loader.db_manager.transaction():
+            loader.db_manager.write_rows(
+                target_table, list(chunk.columns), rows, loader.insert_method, loader.batch_size
+            )
+            loader.checkpoints.record(file_path, sha256, target_table, rows_committed, batch_id)
+
+    # The whole transaction is repeated, so a chunk is written exactly once
+    try:
+        call_with_retries(
+            write, on_retry=loader.reconnect, description=f'chunk {batch_id} of "{file_path}"'
+        )
+    except Error as e:
+        logger.error(
+            f'Error committing chunk {batch_id} of "{file_path}" into {target_table}; '
+            f'a rerun resumes after row {rows_committed - len(rows)}: {e}'
+        )
+        return None
+    return len(rows)
+
+def resume_point(loader: 'CSVToMySQLLoader', csv_file: str, target_table: str,
+                 fingerprint: Optional[dict] = None) -> Optional[dict]:
+    '''Returns the checkpoint to resume the file's load from, or None if it cannot be read.'''
+    try:
+        sha256 = fingerprint['sha256'] if fingerprint else file_hash(csv_file)
+    except FileNotFoundError:
+        return None
+    checkpoint = loader.checkpoints.get(csv_file)
+    # Committed rows only count for the same file content, loading into the same table
+    if checkpoint and checkpoint['file_sha256'] == sha256 \
+            and checkpoint['target_table'] == target_table \
+            and loader.db_manager.table_exists(target_table):
+        logger.info(
+            f'Resuming "{csv_file}" after {checkpoint["rows_committed"]} committed rows '
+            f'(chunk {checkpoint["batch_id"]}).'
+        )
+        return checkpoint
+    if checkpoint:
+        loader.checkpoints.forget(csv_file)
+    return {
+        'file_sha256': sha256,
+        'target_table': target_table,
+        'rows_committed': 0,
+        'batch_id': 0
+    }
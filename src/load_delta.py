@@ -0,0 +1,122 @@
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.compressed_csv import open_csv
+from src.delta import changed_rows, deleted_keys, hash_table_name, row_hashes, stored_hashes
+from src.loading import CSV_ERRORS, log_csv_error
+from src.schema import TableSchema, infer_schema, quote_identifier, type_kind
+
+if TYPE_CHECKING:
+    from src.store_data import CSVToMySQLLoader
+
+
+def delta_key(loader: 'CSVToMySQLLoader', csv_file: str, table_name: str) -> List[str]:
+    '''Returns the primary key to diff on, or [] when a delta load is not possible.'''
+    key_columns = loader.db_manager.primary_key(table_name)
+    if not key_columns:
+        logger.info(f'"{table_name}" has no primary key yet; loading it in full.')
+        return []
+    try:
+        with open_csv(csv_file) as source:
+            header = list(pd.read_csv(source, nrows=0).columns)
+    except CSV_ERRORS:
+        return []
+    if header != [name for name, _ in loader.db_manager.table_columns(table_name)]:
+        logger.info(f'Columns of "{csv_file}" changed; reloading "{table_name}" in full.')
+        return []
+    return key_columns
+
+def load_csv_delta(loader: 'CSVToMySQLLoader', csv_file: str, table_name: str,
+                   key_columns: List[str]) -> Tuple[Optional[int], Optional[TableSchema]]:
+    '''Upserts the rows whose hash changed since the last load; the schema is always None.'''
+    db_manager = loader.db_manager
+    hash_table = create_hash_table(loader, table_name, key_columns)
+    keys = ', '.join(quote_identifier(column) for column in key_columns)
+    hashes = db_manager.query_dataframe(f'SELECT {keys}, row_hash FROM {hash_table}')
+    if hashes is None:
+        return None, None
+    column_types = dict(db_manager.table_columns(table_name))
+    key_kinds = {column: type_kind(column_types[column]) for column in key_columns}
+    stored = stored_hashes(hashes, key_columns, key_kinds)
+
+    rows, seen_keys = 0, []
+    try:
+        for chunk in delta_chunks(loader, csv_file, table_name):
+            changed, changed_hashes, chunk_keys = changed_rows(
+                chunk, key_columns, stored, key_kinds
+            )
+            seen_keys.append(chunk_keys)
+            if changed.empty:
+                continue
+            for target, data in ((table_name, changed), (hash_table, changed_hashes)):
+                inserted = db_manager.insert_data(
+                    target, data, loader.insert_method, loader.batch_size, upsert=True
+                )
+                if inserted is None:
+                    return None, None
+            rows += len(changed)
+    except CSV_ERRORS as e:
+        log_csv_error(csv_file, e)
+        return None, None
+
+    deleted = 0
+    if loader.delete_missing and seen_keys:
+        missing = deleted_keys(stored, seen_keys[0].append(seen_keys[1:]), key_columns)
+        if missing:
+            for target in (hash_table, table_name):
+                deleted = db_manager.delete_keys(target, key_columns, missing)
+                if deleted is None:
+                    return None, None
+    logger.info(
+        f'Delta load of "{table_name}": {rows} new or changed row(s), {deleted} deleted.'
+    )
+    return rows, None
+
+def delta_chunks(loader: 'CSVToMySQLLoader', csv_file: str,
+                 table_name: str) -> Iterator[pd.DataFrame]:
+    '''Yields the file in chunks prepared the way delta loads hash them.'''
+    if loader.chunksize:
+        chunks = loader.iter_csv_chunks(csv_file)
+    else:
+        chunks = [loader.read_csv(csv_file)]
+    schema = None
+    for chunk in chunks:
+        if schema is None:
+            schema = infer_schema(chunk, table_name, loader.schema_overrides, sample=True)
+        yield schema.coerce(chunk)
+
+def create_hash_table(loader: 'CSVToMySQLLoader', table_name: str,
+                      key_columns: List[str]) -> str:
+    '''Creates the row hash side table of the table if needed and returns its name.'''
+    hash_table = hash_table_name(table_name)
+    column_types = dict(loader.db_manager.table_columns(table_name))
+    keys = ', '.join(quote_identifier(column) for column in key_columns)
+    key_definition = ', '.join(
+        f'{quote_identifier(column)} {column_types[column]} NOT NULL' for column in key_columns
+    )
+    loader.db_manager.create_table(
+        hash_table, f'{key_definition}, `row_hash` BIGINT UNSIGNED NOT NULL, PRIMARY KEY ({keys})'
+    )
+    return hash_table
+
+def store_row_hashes(loader: 'CSVToMySQLLoader', csv_file: str, table_name: str,
+                     key_columns: List[str]) -> bool:
+    '''Stores the hash of every row a full load wrote, for the next delta load to diff with.'''
+    hash_table = create_hash_table(loader, table_name, key_columns)
+    try:
+        for chunk in delta_chunks(loader, csv_file, table_name):
+            hashes = chunk[key_columns].copy()
+            hashes['row_hash'] = row_hashes(chunk).to_numpy()
+            inserted = loader.db_manager.insert_data(
+                hash_table, hashes, loader.insert_method, loader.batch_size, upsert=True
+            )
+            if inserted is None:
+                return False
+    except CSV_ERRORS as e:
+        # Only costs the next delta load extra writes, so the full load still succeeds
+        logger.error(f'Error hashing the rows of "{csv_file}": {e}')
+        return False
+    logger.info(f'Stored the row hashes of "{table_name}" for delta loads.')
+    return True
@@ -0,0 +1,67 @@
+import csv
+import io
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import pandas as pd
+
+from src.compressed_csv import compression, decompressed_copy, open_compressed, open_csv
+from src.loading import CSV_ERRORS, infer_table_schema, log_csv_error
+from src.schema import SCHEMA_SAMPLE_ROWS, TableSchema, csv_dtypes
+
+if TYPE_CHECKING:
+    from src.store_data import CSVToMySQLLoader
+
+
+def load_csv_infile(loader: 'CSVToMySQLLoader', file_path: str, table_name: str,
+                    target_table: Optional[str] = None
+                    ) -> Tuple[Optional[int], Optional[TableSchema]]:
+    '''Creates the table from a sample of the CSV file and bulk-loads it with LOAD DATA.'''
+    target_table = target_table or table_name
+    try:
+        dialect = sniff_csv_dialect(file_path)
+        if not dialect['header']:
+            raise pd.errors.EmptyDataError('No columns to parse from file')
+        read_options = {'sep': dialect['delimiter'], 'quotechar': dialect['quotechar']}
+        dtypes = csv_dtypes(file_path, **read_options)
+        with open_csv(file_path) as source:
+            sample = pd.read_csv(source, nrows=SCHEMA_SAMPLE_ROWS, dtype=dtypes, **read_options)
+    except CSV_ERRORS as e:
+        log_csv_error(file_path, e)
+        return None, None
+    schema = infer_table_schema(sample, table_name, loader.schema_overrides, sample=True)
+    loader.db_manager.create_table(target_table, schema.definition())
+    # LOAD DATA reads a file from disk, so a compressed CSV is unpacked to a temp copy
+    with decompressed_copy(file_path) as plain_path:
+        rows = loader.db_manager.load_data_infile(
+            target_table,
+            plain_path,
+            schema.column_names,
+            column_expressions={
+                column.name: column.load_expression() for column in schema.columns
+            },
+            delimiter=dialect['delimiter'],
+            quotechar=dialect['quotechar'],
+            line_terminator=dialect['line_terminator']
+        )
+    return rows, schema
+
+def sniff_csv_dialect(file_path: str, sample_size: int = 64 * 1024) -> dict:
+    '''Detects the header, delimiter, quote character and line terminator of a CSV file.'''
+    if compression(file_path) is None:
+        f = open(file_path, newline='', encoding='utf-8-sig')
+    else:
+        f = io.TextIOWrapper(open_compressed(file_path), encoding='utf-8-sig', newline='')
+    with f:
+        sample = f.read(sample_size)
+    try:
+        sniffed = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        delimiter, quotechar = sniffed.delimiter, sniffed.quotechar or '"'
+    except csv.Error:
+        delimiter, quotechar = ',', '"'
+    header = next(csv.reader(sample.splitlines(), delimiter=delimiter, quotechar=quotechar), [])
+    return {
+        'header': header,
+        'delimiter': delimiter,
+        'quotechar': quotechar,
+        'line_terminator': '\r\n' if '\r\n' in sample else '\n'
+    }
@@ -0,0 +1,78 @@
+import itertools
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from src.loading import CSV_ERRORS, infer_table_schema, log_csv_error
+from src.metrics import stage_timer
+from src.pipeline import run_pipeline
+from src.rows import frame_rows
+from src.schema import TableSchema
+
+if TYPE_CHECKING:
+    from src.store_data import CSVToMySQLLoader
+
+# Rows parsed per pipelined batch when no chunksize is set
+PIPELINE_CHUNKSIZE = 50_000
+
+
+def load_csv_pipelined(loader: 'CSVToMySQLLoader', file_path: str, table_name: str,
+                       target_table: Optional[str] = None
+                       ) -> Tuple[Optional[int], Optional[TableSchema]]:
+    '''Streams the CSV file into the table with parsing and inserting overlapped.'''
+    target_table = target_table or table_name
+    consumers = loader.pipeline_consumers
+    if consumers > 1 and loader.db_manager.pool is None:
+        logger.warning('Pipelined inserts share one connection; using a single consumer.')
+        consumers = 1
+    schema = None
+    try:
+        chunks = loader.iter_csv_chunks(file_path, loader.chunksize or PIPELINE_CHUNKSIZE)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            logger.error(f'CSV file "{file_path}" is empty.')
+            return None, None
+        # The table is created before any consumer starts, so none of them races the DDL
+        schema = infer_table_schema(first_chunk, table_name, loader.schema_overrides, sample=True)
+        columns = list(first_chunk.columns)
+        loader.db_manager.create_table(target_table, schema.definition())
+
+        def batches() -> Iterator[List[tuple]]:
+            for chunk in itertools.chain([first_chunk], chunks):
+                # A fresh list per chunk, since queued batches are still waiting to be sent
+                with stage_timer(loader.file_metrics, 'convert'):
+                    rows = frame_rows(schema.coerce(chunk), schema)
+                yield rows
+
+        def insert(rows: List[tuple]) -> Optional[int]:
+            return loader.db_manager.insert_rows(
+                target_table, columns, rows, loader.insert_method, loader.batch_size
+            )
+
+        def consumer_context() -> Any:
+            if loader.bulk_session:
+                return loader.db_manager.bulk_load_session(
+                    target_table, foreign_key_checks=loader.load_mode == 'append'
+                )
+            return nullcontext()
+
+        rows, stats = run_pipeline(
+            batches(), insert, consumers, loader.queue_depth, consumer_context
+        )
+    except CSV_ERRORS as e:
+        log_csv_error(file_path, e)
+        return None, schema
+    if loader.file_metrics is not None:
+        loader.file_metrics.add(
+            producer_blocked_seconds=stats.producer_blocked_seconds,
+            consumer_idle_seconds=stats.consumer_idle_seconds,
+            max_queue_depth=stats.max_queue_depth
+        )
+    logger.info(
+        f'Pipelined {stats.rows} rows from "{file_path}" in {stats.batches} batches: '
+        f'produce {stats.produce_seconds:.2f}s (blocked on full queue '
+        f'{stats.producer_blocked_seconds:.2f}s), insert {stats.insert_seconds:.2f}s '
+        f'(idle on empty queue {stats.consumer_idle_seconds:.2f}s).'
+    )
+    return rows, schema
@@ -0,0 +1,77 @@
+from typing import Any, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from src.compressed_csv import csv_stem
+from src.schema import TableSchema, infer_schema
+
+# Errors reading a CSV file that fail its load without stopping the others
+CSV_ERRORS = (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError)
+
+
+def get_table_name(csv_file: str) -> str:
+    '''Derives the table name from a CSV file name, e.g. customers_dataset.csv.gz -> customers.'''
+    return csv_stem(csv_file)[:-8]
+
+def staging_table_name(table_name: str) -> str:
+    '''Returns the name of the table a swap load writes to before renaming it live.'''
+    return f'{table_name}__staging'
+
+def load_result(csv_file: str, table_name: str, rows: int = 0, seconds: float = 0.0,
+                index_seconds: float = 0.0, status: str = 'loaded') -> dict:
+    '''Builds the per-file summary returned by the loaders.'''
+    return {
+        'file': str(csv_file),
+        'table': table_name,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'index_seconds': round(index_seconds, 3),
+        'status': status
+    }
+
+def log_load_summary(results: List[dict]) -> None:
+    '''Logs one line per loaded file followed by the totals.'''
+    for result in results:
+        logger.info(
+            f'{result["table"]:<40} {result["rows"]:>12,} rows {result["seconds"]:>9.2f}s '
+            f'(keys {result["index_seconds"]:.2f}s) {result["status"]}'
+        )
+    total_rows = sum(result['rows'] for result in results if result['status'] == 'loaded')
+    failed = sum(result['status'] == 'failed' for result in results)
+    skipped = sum(result['status'] == 'skipped' for result in results)
+    logger.info(
+        f'Loaded {total_rows:,} rows from {len(results)} file(s), {skipped} skipped unchanged, '
+        f'{failed} failed.'
+    )
+
+def log_csv_error(csv_file: str, error: Exception, rows: Optional[int] = None) -> None:
+    '''Logs one of CSV_ERRORS; rows is how far the file had been read.'''
+    if isinstance(error, FileNotFoundError):
+        logger.error(f'CSV file "{csv_file}" not found.')
+    elif isinstance(error, pd.errors.EmptyDataError):
+        logger.error(f'CSV file "{csv_file}" is empty.')
+    else:
+        after = f' after {rows} rows' if rows else ''
+        logger.error(f'Error parsing CSV file "{csv_file}"{after}: {error}')
+
+def infer_table_schema(df: pd.DataFrame, table_name: str, overrides: Optional[dict] = None,
+                       sample: bool = False) -> TableSchema:
+    '''Infers the table schema, applying overrides and writing the schema report.'''
+    schema = infer_schema(df, table_name, overrides, sample)
+    report_path = schema.write_report()
+    chosen = ', '.join(f'{column.name} {column.mysql_type}' for column in schema.columns)
+    logger.info(f'Schema for "{table_name}": {chosen} (report: "{report_path}").')
+    return schema
+
+def swap_in(database: Any, table_name: str, staging_table: str, rows: int) -> bool:
+    '''Validates the staging table's row count and atomically swaps it in for the table.'''
+    # database is a MySQLDatabaseManager or a StorageBackend; a mismatched staging table is kept
+    staged_rows = database.count_rows(staging_table)
+    if staged_rows != rows:
+        logger.error(
+            f'Staging table "{staging_table}" holds {staged_rows} rows, expected {rows}; '
+            f'"{table_name}" was left unchanged.'
+        )
+        return False
+    return database.swap_table(staging_table, table_name)
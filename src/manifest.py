@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+from loguru import logger
+
+from src.config import LOAD_MANIFEST_FILE
+
+# Bytes read at a time while hashing a file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class LoadManifest:
+    def __init__(self, path: Path = LOAD_MANIFEST_FILE) -> None:
+        '''Tracks the fingerprint of every file at its last successful load.
+
+        Entries are keyed by absolute file path and hold the file size, mtime, SHA-256,
+        target table, row count and load time. The manifest is rewritten atomically after
+        every change, so a crash never leaves it half-written.
+        '''
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = self._read()
+
+    def _read(self) -> dict:
+        '''Reads the manifest from disk, starting empty if it is missing or unreadable.'''
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f'Error reading load manifest "{self.path}", starting empty: {e}')
+            return {}
+
+    def save(self) -> None:
+        '''Writes the manifest to a temporary file and moves it into place.'''
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def check(self, file_path: str, table_name: str) -> Tuple[bool, dict]:
+        '''Returns whether the file is unchanged since its last load, and its fingerprint.
+
+        A matching size and mtime is taken as unchanged without reading the file. Otherwise
+        the content hash decides, so a touched but identical file is still skipped.
+        '''
+        key = str(Path(file_path).resolve())
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry['table'] == table_name and entry['size'] == stat.st_size \
+                and entry['mtime'] == stat.st_mtime:
+            return True, entry
+        fingerprint = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': file_hash(file_path)
+        }
+        if entry and entry['table'] == table_name and entry['sha256'] == fingerprint['sha256']:
+            entry = {**entry, 'mtime': stat.st_mtime}
+            with self.lock:
+                self.entries[key] = entry
+                self.save()
+            return True, entry
+        return False, fingerprint
+
+    def record(self, file_path: str, table_name: str, fingerprint: dict, rows: int) -> None:
+        '''Stores the fingerprint of a file that was loaded successfully.'''
+        key = str(Path(file_path).resolve())
+        with self.lock:
+            self.entries[key] = {
+                'size': fingerprint['size'],
+                'mtime': fingerprint['mtime'],
+                'sha256': fingerprint['sha256'],
+                'table': table_name,
+                'rows': rows,
+                'loaded_at': datetime.now(timezone.utc).isoformat()
+            }
+            self.save()
+
+    def forget(self, file_path: str) -> None:
+        '''Drops the entry of a file so it is reloaded even if a load fails halfway.'''
+        key = str(Path(file_path).resolve())
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.save()
+
+    def get(self, file_path: str) -> Optional[dict]:
+        '''Returns the entry recorded for the file, if any.'''
+        with self.lock:
+            return self.entries.get(str(Path(file_path).resolve()))
+
+
+def file_hash(file_path: str) -> str:
+    '''Returns the SHA-256 of the file contents.'''
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,107 @@
+import json
+import os
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.config import REPORTS_DIR
+
+# Constants
+# A string column becomes categorical when its distinct values are at most this share of its rows
+CATEGORY_THRESHOLD = float(os.environ.get('MEMORY_CATEGORY_THRESHOLD', 0.5))
+# Arrow-backed strings take a fraction of the memory of Python str objects
+STRING_DTYPE = 'string[pyarrow]'
+
+
+def optimize_dtypes(df: pd.DataFrame, category_threshold: float = CATEGORY_THRESHOLD
+                    ) -> Tuple[pd.DataFrame, dict]:
+    '''Shrinks the DataFrame's memory footprint without changing any value.
+
+    Integers are downcast to the smallest type holding their range, floats holding only
+    whole numbers become nullable integers and other floats become float32 when that is
+    exact. Low-cardinality strings (country, gender, segment, ...) become categoricals and
+    the remaining object strings are stored as Arrow strings. Returns the optimized
+    DataFrame and a report of each column's dtype and deep memory use before and after.
+    '''
+    before = df.memory_usage(index=False, deep=True)
+    optimized = df.copy()
+    for name in df.columns:
+        optimized[name] = optimize_column(df[name], category_threshold)
+    after = optimized.memory_usage(index=False, deep=True)
+    columns = [
+        {
+            'column': name,
+            'dtype_before': str(df[name].dtype),
+            'dtype_after': str(optimized[name].dtype),
+            'bytes_before': int(before[name]),
+            'bytes_after': int(after[name])
+        }
+        for name in df.columns
+    ]
+    report = {
+        'rows': len(df),
+        'bytes_before': int(before.sum()),
+        'bytes_after': int(after.sum()),
+        'columns': columns
+    }
+    return optimized, report
+
+def optimize_column(series: pd.Series, category_threshold: float = CATEGORY_THRESHOLD) -> pd.Series:
+    '''Returns the column in the most compact dtype that keeps every value.'''
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return downcast_integers(series)
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna().to_numpy()
+        if values.size and np.all(np.isfinite(values)) and np.all(np.mod(values, 1) == 0) \
+                and np.abs(values).max() < 2**53:
+            return downcast_integers(series.astype('Int64'))
+        narrowed = series.astype('float32')
+        if np.array_equal(narrowed.to_numpy(dtype=float), series.to_numpy(dtype=float),
+                          equal_nan=True):
+            return narrowed
+        return series
+    if pd.api.types.is_string_dtype(series) or series.dtype == object:
+        count = series.count()
+        if count and series.nunique() <= category_threshold * count:
+            return series.astype('category')
+        # Only object columns; pandas' own string dtypes are already Arrow-backed or compact
+        if series.dtype == object and series.dropna().map(type).eq(str).all():
+            return series.astype(STRING_DTYPE)
+    return series
+
+def downcast_integers(series: pd.Series) -> pd.Series:
+    '''Downcasts an integer column to the smallest signed or unsigned type holding it.'''
+    values = series.dropna()
+    if values.empty:
+        return series
+    return pd.to_numeric(series, downcast='unsigned' if values.min() >= 0 else 'integer')
+
+def log_memory_report(table_name: str, report: dict) -> None:
+    '''Logs the columns whose footprint changed and the total saving.'''
+    for column in report['columns']:
+        if column['bytes_after'] != column['bytes_before']:
+            logger.info(
+                f'{table_name}.{column["column"]}: {column["dtype_before"]} -> '
+                f'{column["dtype_after"]}, {column["bytes_before"]:,} -> '
+                f'{column["bytes_after"]:,} bytes'
+            )
+    saved = report['bytes_before'] - report['bytes_after']
+    share = saved / report['bytes_before'] if report['bytes_before'] else 0.0
+    logger.info(
+        f'Memory of "{table_name}": {report["bytes_before"]:,} -> {report["bytes_after"]:,} '
+        f'bytes ({share:.0%} saved).'
+    )
+
+def write_memory_report(table_name: str, report: dict,
+                        reports_dir: Path = REPORTS_DIR / 'memory') -> Path:
+    '''Writes the memory report to reports/memory/<table>.json.'''
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    report_path = reports_dir / f'{table_name}.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report_path
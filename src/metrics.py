@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import ContextManager, Iterable, Iterator, List, Optional, TypeVar
+
+import numpy as np
+from loguru import logger
+from tqdm import tqdm
+
+from src.config import REPORTS_DIR, env_flag
+
+# Constants
+LOAD_METRICS = env_flag('LOAD_METRICS', True)
+LOAD_PROGRESS = env_flag('LOAD_PROGRESS', True)
+LATENCY_PERCENTILES = (50, 90, 99)
+
+T = TypeVar('T')
+
+
+class FileMetrics:
+    def __init__(self, csv_file: str, table_name: str, progress: Optional[tqdm] = None) -> None:
+        '''Measures the load of one file: throughput, batch latency and where time went.
+
+        parse_seconds covers reading and parsing the CSV, convert_seconds turning frames
+        into insert rows and insert_seconds the round-trips of every insert batch. Stages
+        may overlap (pipelined loads), so they can add up to more than the wall time.
+        Pipelined loads also record their queue stalls: producer_blocked_seconds (queue
+        full, inserts are the bottleneck), consumer_idle_seconds (queue empty, parsing is)
+        and max_queue_depth. Counters can be updated from any thread.
+        '''
+        self.lock = threading.Lock()
+        self.file = str(csv_file)
+        self.table = table_name
+        self.bytes = os.path.getsize(csv_file) if os.path.exists(csv_file) else 0
+        self.progress = progress
+        self.rows = 0
+        self.batches = 0
+        self.batch_seconds: List[float] = []
+        self.parse_seconds = 0.0
+        self.convert_seconds = 0.0
+        self.insert_seconds = 0.0
+        self.producer_blocked_seconds = 0.0
+        self.consumer_idle_seconds = 0.0
+        self.max_queue_depth = 0
+        self.retries = 0
+        self.status = 'running'
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, **values: float) -> None:
+        '''Adds to counters from any thread.'''
+        with self.lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        '''Adds the time spent in the block to <stage>_seconds.'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(**{f'{stage}_seconds': time.perf_counter() - start})
+
+    def record_batch(self, rows: int, seconds: float) -> None:
+        '''Records one insert round-trip and advances the progress bar.'''
+        with self.lock:
+            self.batches += 1
+            self.batch_seconds.append(seconds)
+            self.insert_seconds += seconds
+        if self.progress is not None:
+            self.progress.update(max(rows, 0))
+
+    def finish(self, rows: int, status: str) -> None:
+        '''Stops the clock; rows is what the load reported, so retried batches count once.'''
+        self.seconds = time.perf_counter() - self.start
+        self.rows = rows
+        self.status = status
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            latencies = np.array(self.batch_seconds)
+        seconds = self.seconds or time.perf_counter() - self.start
+        latency = {
+            f'p{percentile}': round(float(np.percentile(latencies, percentile)), 4)
+            for percentile in LATENCY_PERCENTILES
+        } if latencies.size else {}
+        if latencies.size:
+            latency['max'] = round(float(latencies.max()), 4)
+        return {
+            'file': self.file,
+            'table': self.table,
+            'status': self.status,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.rows / seconds, 1) if seconds else 0.0,
+            'bytes_per_second': round(self.bytes / seconds, 1) if seconds else 0.0,
+            'parse_seconds': round(self.parse_seconds, 3),
+            'convert_seconds': round(self.convert_seconds, 3),
+            'insert_seconds': round(self.insert_seconds, 3),
+            'producer_blocked_seconds': round(self.producer_blocked_seconds, 3),
+            'consumer_idle_seconds': round(self.consumer_idle_seconds, 3),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'batch_latency_seconds': latency,
+            'retries': self.retries
+        }
+
+
+class RunMetrics:
+    def __init__(self, progress: bool = LOAD_PROGRESS) -> None:
+        '''Collects the FileMetrics of one loader run behind a shared progress bar.
+
+        The bar counts inserted rows across every file, and loguru already writes through
+        tqdm.write, so log lines do not break it.
+        '''
+        self.lock = threading.Lock()
+        self.files: List[FileMetrics] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.progress = (
+            tqdm(desc='Loading', unit=' rows', unit_scale=True, dynamic_ncols=True)
+            if progress else None
+        )
+
+    def start_file(self, csv_file: str, table_name: str) -> FileMetrics:
+        '''Starts measuring the load of a file.'''
+        metrics = FileMetrics(csv_file, table_name, self.progress)
+        with self.lock:
+            self.files.append(metrics)
+        if self.progress is not None:
+            self.progress.set_postfix_str(table_name, refresh=False)
+        return metrics
+
+    def summary(self) -> dict:
+        '''Returns the run totals and every file's metrics.'''
+        seconds = time.perf_counter() - self.start
+        files = [metrics.as_dict() for metrics in self.files]
+        rows = sum(metrics['rows'] for metrics in files if metrics['status'] == 'loaded')
+        data_bytes = sum(metrics['bytes'] for metrics in files if metrics['status'] == 'loaded')
+        return {
+            'started_at': self.started_at.isoformat(),
+            'seconds': round(seconds, 3),
+            'rows': rows,
+            'bytes': data_bytes,
+            'rows_per_second': round(rows / seconds, 1) if seconds else 0.0,
+            'bytes_per_second': round(data_bytes / seconds, 1) if seconds else 0.0,
+            'retries': sum(metrics['retries'] for metrics in files),
+            'producer_blocked_seconds': round(
+                sum(metrics['producer_blocked_seconds'] for metrics in files), 3
+            ),
+            'consumer_idle_seconds': round(
+                sum(metrics['consumer_idle_seconds'] for metrics in files), 3
+            ),
+            'files': files
+        }
+
+    def finish(self, reports_dir: Path = REPORTS_DIR / 'load_metrics') -> Path:
+        '''Closes the progress bar, logs throughput and writes the summary JSON.'''
+        if self.progress is not None:
+            self.progress.close()
+        summary = self.summary()
+        for metrics in summary['files']:
+            if metrics['status'] != 'loaded':
+                continue
+            latency = metrics['batch_latency_seconds']
+            logger.info(
+                f'{metrics["table"]:<40} {metrics["rows_per_second"]:>12,.0f} rows/s '
+                f'{metrics["bytes_per_second"] / 2**20:>8.1f} MiB/s | parse '
+                f'{metrics["parse_seconds"]:.2f}s convert {metrics["convert_seconds"]:.2f}s '
+                f'insert {metrics["insert_seconds"]:.2f}s | batch p50 '
+                f'{latency.get("p50", 0.0) * 1000:.0f}ms p99 {latency.get("p99", 0.0) * 1000:.0f}ms'
+                f' | {metrics["retries"]} retries'
+                + (
+                    f' | queue full {metrics["producer_blocked_seconds"]:.2f}s empty '
+                    f'{metrics["consumer_idle_seconds"]:.2f}s'
+                    if metrics['max_queue_depth'] else ''
+                )
+            )
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        report_path = reports_dir / f'load_{self.started_at.strftime("%Y%m%dT%H%M%SZ")}.json'
+        with open(report_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(
+            f'Loaded {summary["rows"]:,} rows at {summary["rows_per_second"]:,.0f} rows/s '
+            f'(metrics: "{report_path}").'
+        )
+        return report_path
+
+
+def stage_timer(metrics: Optional[FileMetrics], stage: str) -> ContextManager[None]:
+    '''Times a block into the stage when metrics are being collected.'''
+    return metrics.timed(stage) if metrics is not None else nullcontext()
+
+def timed_iter(iterable: Iterable[T], metrics: Optional[FileMetrics],
+               stage: str = 'parse') -> Iterator[T]:
+    '''Yields from iterable, adding the time spent producing each item to the stage.'''
+    iterator = iter(iterable)
+    if metrics is None:
+        yield from iterator
+        return
+    while True:
+        with metrics.timed(stage):
+            item = next(iterator, None)
+        if item is None:
+            return
+        yield item
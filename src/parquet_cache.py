@@ -0,0 +1,132 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from logs.log_config import configure_logging
+from src.arrow_csv import read_csv_batches
+from src.compressed_csv import csv_stem, open_csv
+from src.config import EXTERNAL_DATA_DIR, INTERIM_DATA_DIR
+from src.loading import get_table_name
+from src.manifest import LoadManifest
+from src.schema import SCHEMA_SAMPLE_ROWS, csv_dtypes, infer_schema, load_schema_overrides
+
+# Constants
+PARQUET_COMPRESSION = os.environ.get('PARQUET_COMPRESSION', 'zstd')
+PARQUET_MANIFEST_FILE = INTERIM_DATA_DIR / 'parquet_manifest.json'
+# Rows parsed and written at a time while converting, which bounds memory
+CONVERT_BATCH_ROWS = 500_000
+
+
+class ParquetCache:
+    def __init__(self, cache_dir: Path = INTERIM_DATA_DIR,
+                 schema_overrides: Optional[dict] = None,
+                 compression: str = PARQUET_COMPRESSION) -> None:
+        '''Keeps typed, compressed Parquet copies of CSV files in cache_dir.
+
+        Each copy is named <stem>-<sha256 prefix>.parquet after the source file's content
+        hash, so a copy is only ever reused for identical content. Fingerprints are tracked
+        in a manifest, so an untouched source is not even re-hashed. Column types come from
+        the same schema inference the loader uses.
+        '''
+        self.cache_dir = Path(cache_dir)
+        self.schema_overrides = (
+            load_schema_overrides() if schema_overrides is None else schema_overrides
+        )
+        self.compression = compression
+        self.manifest = LoadManifest(self.cache_dir / PARQUET_MANIFEST_FILE.name)
+
+    def path(self, csv_file: str) -> Path:
+        '''Returns the Parquet copy of the CSV file, converting it if the source changed.'''
+        stem = csv_stem(csv_file)
+        unchanged, fingerprint = self.manifest.check(csv_file, stem)
+        parquet_path = self.cache_dir / f'{stem}-{fingerprint["sha256"][:16]}.parquet'
+        if unchanged and parquet_path.exists():
+            return parquet_path
+        previous = self.manifest.get(csv_file)
+        rows = self.convert(csv_file, parquet_path)
+        if previous and previous['sha256'] != fingerprint['sha256']:
+            (self.cache_dir / f'{stem}-{previous["sha256"][:16]}.parquet').unlink(missing_ok=True)
+        self.manifest.record(csv_file, stem, fingerprint, rows)
+        return parquet_path
+
+    def convert(self, csv_file: str, parquet_path: Path) -> int:
+        '''Writes the CSV file to parquet_path batch by batch and returns the row count.
+
+        The file is written under a temporary name and moved into place, so a reader never
+        sees a half-written copy. Values pyarrow cannot parse raise pandas' ParserError,
+        which every reader already handles.
+        '''
+        dtypes = csv_dtypes(csv_file)
+        with open_csv(csv_file) as source:
+            sample = pd.read_csv(source, nrows=SCHEMA_SAMPLE_ROWS, dtype=dtypes)
+        # Overrides are keyed by table, so the copy gets the types the loader would use
+        schema = infer_schema(sample, get_table_name(csv_file), self.schema_overrides,
+                              sample=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        os.close(fd)
+        rows, writer = 0, None
+        try:
+            for batch in read_csv_batches(csv_file, schema, CONVERT_BATCH_ROWS,
+                                          exact_decimals=False):
+                if writer is None:
+                    writer = pq.ParquetWriter(temp_path, batch.schema, compression=self.compression)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+            if writer is None:
+                # A header-only file still gets a copy so readers see its columns
+                empty = pa.table({name: pa.array([], pa.string()) for name in sample.columns})
+                pq.write_table(empty, temp_path, compression=self.compression)
+            else:
+                writer.close()
+            os.replace(temp_path, parquet_path)
+        except BaseException as e:
+            if writer is not None:
+                writer.close()
+            Path(temp_path).unlink(missing_ok=True)
+            if isinstance(e, pa.ArrowInvalid):
+                raise pd.errors.ParserError(str(e)) from e
+            raise
+        logger.info(f'Converted "{csv_file}" to "{parquet_path}" ({rows} rows).')
+        return rows
+
+    def read(self, csv_file: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        '''Reads the CSV file's data, only the given columns if any, from its Parquet copy.'''
+        return pd.read_parquet(self.path(csv_file), columns=columns)
+
+    def iter_batches(self, csv_file: str, batch_size: int,
+                     columns: Optional[List[str]] = None) -> Iterator[pa.RecordBatch]:
+        '''Yields the CSV file's data from its Parquet copy as record batches.'''
+        parquet_file = pq.ParquetFile(self.path(csv_file))
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+
+    def iter_chunks(self, csv_file: str, chunksize: int,
+                    columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        '''Yields the CSV file's data from its Parquet copy as DataFrames.'''
+        for batch in self.iter_batches(csv_file, chunksize, columns):
+            yield batch.to_pandas()
+
+
+def read_cached_csv(csv_file: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    '''Reads a CSV file through the default cache; the entry point for notebooks.'''
+    return ParquetCache().read(csv_file, columns)
+
+def main():
+    '''Main entry point for the script.'''
+    configure_logging(__file__)  # Set up logging at the start of the program
+
+    from src.store_data import get_files
+
+    cache = ParquetCache()
+    for csv_file in get_files(EXTERNAL_DATA_DIR, 'csv'):
+        logger.info(f'"{csv_file}" is cached as "{cache.path(csv_file)}".')
+
+
+if __name__ == '__main__':
+    main()
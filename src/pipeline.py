@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+# Seconds a blocked put or get waits before rechecking whether the other side failed
+POLL_INTERVAL = 0.1
+
+# Marks the end of the batch stream on the queue
+_DONE = object()
+
+
+class _Aborted(Exception):
+    '''Raised by a consumer leaving its context because the load failed.'''
+
+
+class PipelineStats:
+    def __init__(self) -> None:
+        '''Times each stage of a pipelined load and how long it waited on the other.
+
+        producer_blocked_seconds grows when the queue is full (inserts are the bottleneck);
+        consumer_idle_seconds grows when the queue is empty (parsing is the bottleneck).
+        '''
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.produce_seconds = 0.0
+        self.producer_blocked_seconds = 0.0
+        self.insert_seconds = 0.0
+        self.consumer_idle_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def add(self, **values: float) -> None:
+        '''Adds to counters from any thread.'''
+        with self.lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'produce_seconds': round(self.produce_seconds, 3),
+            'producer_blocked_seconds': round(self.producer_blocked_seconds, 3),
+            'insert_seconds': round(self.insert_seconds, 3),
+            'consumer_idle_seconds': round(self.consumer_idle_seconds, 3),
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+def run_pipeline(batches: Iterator[List[tuple]], insert: Callable[[List[tuple]], Optional[int]],
+                 consumers: int = 1, queue_depth: int = 4,
+                 consumer_context: Callable[[], ContextManager[Any]] = nullcontext
+                 ) -> Tuple[Optional[int], PipelineStats]:
+    '''Overlaps producing batches with inserting them through a bounded queue.
+
+    A producer thread drives the batches iterator (parsing and converting CSV chunks) and
+    puts each batch on a queue holding at most queue_depth batches, which bounds memory.
+    consumers threads take batches off the queue and pass them to insert, each inside its
+    own consumer_context (e.g. a bulk load session). Returns the rows inserted, or None if
+    an insert failed; an exception raised by the producer is re-raised here.
+    '''
+    batch_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+    stats = PipelineStats()
+    failed = threading.Event()
+    producer_error: List[BaseException] = []
+
+    def put(item: Any) -> bool:
+        start = time.perf_counter()
+        while not failed.is_set():
+            try:
+                batch_queue.put(item, timeout=POLL_INTERVAL)
+                stats.add(producer_blocked_seconds=time.perf_counter() - start)
+                with stats.lock:
+                    stats.max_queue_depth = max(stats.max_queue_depth, batch_queue.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(batches)
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = next(iterator, _DONE)
+                stats.add(produce_seconds=time.perf_counter() - start)
+                if batch is _DONE or not put(batch):
+                    break
+        except BaseException as e:
+            producer_error.append(e)
+            failed.set()
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+            for _ in range(consumers):
+                put(_DONE)
+
+    def consume() -> None:
+        try:
+            with consumer_context():
+                while not failed.is_set():
+                    start = time.perf_counter()
+                    try:
+                        batch = batch_queue.get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        stats.add(consumer_idle_seconds=time.perf_counter() - start)
+                        continue
+                    stats.add(consumer_idle_seconds=time.perf_counter() - start)
+                    if batch is _DONE:
+                        return
+                    start = time.perf_counter()
+                    inserted = insert(batch)
+                    stats.add(insert_seconds=time.perf_counter() - start)
+                    if inserted is None:
+                        failed.set()
+                    else:
+                        stats.add(batches=1, rows=inserted)
+                # Only reached when the load failed: leave the context by raising, so a bulk
+                # load session rolls back its uncommitted rows instead of committing them
+                raise _Aborted()
+        except _Aborted:
+            pass
+        except Exception as e:
+            logger.error(f'Pipeline consumer failed: {e}')
+            failed.set()
+
+    threads = [threading.Thread(target=produce, name='pipeline-producer')]
+    threads += [
+        threading.Thread(target=consume, name=f'pipeline-consumer-{i}') for i in range(consumers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if producer_error:
+        raise producer_error[0]
+    return (None if failed.is_set() else stats.rows), stats
@@ -0,0 +1,65 @@
+import os
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from loguru import logger
+from mysql.connector import Error, errorcode
+
+# Constants
+# Only resumable loads (RESUMABLE_LOAD) retry: a chunk committed with its checkpoint is the
+# only write that can be repeated safely. Other loads fail on the first error of any kind.
+RETRY_ATTEMPTS = int(os.environ.get('RETRY_ATTEMPTS', 5))
+RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 0.5))
+RETRY_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', 30.0))
+
+# Errors after which the same statements can succeed once the server or network recovers
+TRANSIENT_ERRORS = {
+    errorcode.ER_CON_COUNT_ERROR,       # 1040 too many connections
+    errorcode.ER_LOCK_WAIT_TIMEOUT,     # 1205
+    errorcode.ER_LOCK_DEADLOCK,         # 1213
+    errorcode.CR_CONNECTION_ERROR,      # 2002
+    errorcode.CR_CONN_HOST_ERROR,       # 2003
+    errorcode.CR_SERVER_GONE_ERROR,     # 2006
+    errorcode.CR_SERVER_LOST,           # 2013
+    errorcode.CR_SERVER_LOST_EXTENDED,  # 2055
+}
+
+T = TypeVar('T')
+
+
+def is_transient(error: BaseException) -> bool:
+    '''Returns whether the MySQL error is worth retrying.'''
+    return isinstance(error, Error) and error.errno in TRANSIENT_ERRORS
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY,
+                  max_delay: float = RETRY_MAX_DELAY) -> float:
+    '''Returns the wait before retry number attempt (from 1): exponential, with full jitter.'''
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+def call_with_retries(func: Callable[[], T], attempts: int = RETRY_ATTEMPTS,
+                      on_retry: Optional[Callable[[], None]] = None,
+                      description: str = 'operation') -> T:
+    '''Calls func, retrying it with exponential backoff while it fails with transient errors.
+
+    func must be safe to repeat, e.g. a whole transaction. on_retry runs before each retry
+    (e.g. to reconnect); if it fails too, the next attempt is still made after the next
+    wait. The last error is re-raised once attempts are used up; other errors at once.
+    '''
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except Error as e:
+            if not is_transient(e) or attempt == attempts:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f'Transient error during {description} ({e}); retry {attempt} of '
+                f'{attempts - 1} in {delay:.1f}s.'
+            )
+            time.sleep(delay)
+            if on_retry:
+                try:
+                    on_retry()
+                except Error as reconnect_error:
+                    logger.warning(f'Reconnect before retry failed: {reconnect_error}')
@@ -0,0 +1,86 @@
+import re
+from decimal import Decimal
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.schema import ColumnSchema, TableSchema
+
+DATE_FORMAT = '%Y-%m-%d'
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DECIMAL_TYPE = re.compile(r'^DECIMAL\(\s*\d+\s*,\s*(\d+)\s*\)', re.IGNORECASE)
+
+
+def frame_rows(data: pd.DataFrame, schema: Optional[TableSchema] = None,
+               buffer: Optional[List[tuple]] = None) -> List[tuple]:
+    '''Converts a DataFrame to a list of tuples of values the driver sends as-is.
+
+    Each column is converted in one pass: numbers become Python ints and floats, NaN, NaT
+    and NA become None, timestamps become 'YYYY-MM-DD HH:MM:SS[.ffffff]' strings, and
+    columns the schema types as DECIMAL(p, s) become strings rounded to s places, so the
+    driver does no per-value type dispatch. The rows are then zipped in C. With a buffer,
+    it is cleared and refilled instead of allocating a new list; the caller must be done
+    with its previous contents.
+    '''
+    columns = [
+        column_values(data.iloc[:, i], schema_column(schema, name))
+        for i, name in enumerate(data.columns)
+    ]
+    if buffer is None:
+        return list(zip(*columns)) if columns else [()] * len(data)
+    buffer.clear()
+    buffer.extend(zip(*columns) if columns else [()] * len(data))
+    return buffer
+
+def schema_column(schema: Optional[TableSchema], name: str) -> Optional[ColumnSchema]:
+    '''Returns the schema's column of that name, or None.'''
+    if schema is None:
+        return None
+    return next((column for column in schema.columns if column.name == name), None)
+
+def column_values(series: pd.Series, column: Optional[ColumnSchema] = None) -> list:
+    '''Converts one column to a list of driver-ready Python values.'''
+    nulls = series.isna().to_numpy(dtype=bool)
+    dtype = series.dtype
+    decimal = DECIMAL_TYPE.match(column.mysql_type) if column else None
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        arrow_type = str(getattr(dtype, 'pyarrow_dtype', ''))
+        if arrow_type.startswith('date') or (column is not None and column.kind == 'date'):
+            date_format = DATE_FORMAT
+        elif (series.dt.microsecond[~nulls] != 0).any():
+            date_format = f'{DATETIME_FORMAT}.%f'
+        else:
+            date_format = DATETIME_FORMAT
+        values = series.dt.strftime(date_format).to_numpy(dtype=object)
+    elif pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        if not nulls.any():
+            return series.to_numpy().tolist()
+        # Nullable integers and booleans: convert the present values, leave the rest None
+        values = np.full(len(series), None, dtype=object)
+        values[~nulls] = series[~nulls].to_numpy().tolist()
+        return values.tolist()
+    elif pd.api.types.is_float_dtype(dtype):
+        numbers = series.to_numpy(dtype=float, na_value=np.nan)
+        if decimal:
+            values = np.char.mod(f'%.{decimal.group(1)}f', numbers).astype(object)
+        else:
+            values = np.empty(len(numbers), dtype=object)
+            values[:] = numbers.tolist()
+    else:
+        values = series.to_numpy(dtype=object)
+        if decimal:
+            is_decimal = np.fromiter(
+                (isinstance(value, (Decimal, float)) for value in values), bool, len(values)
+            )
+            if is_decimal.any():
+                values = values.copy()
+                values[is_decimal] = [
+                    f'{value:.{decimal.group(1)}f}' for value in values[is_decimal]
+                ]
+    if nulls.any():
+        # to_numpy may return the frame's own object array, so never write into it
+        values = values.copy()
+        values[nulls] = None
+    return values.tolist()
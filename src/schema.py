@@ -0,0 +1,366 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.compressed_csv import open_csv
+from src.config import REPORTS_DIR, SCHEMA_OVERRIDES_FILE
+
+# Rows read to infer a schema when the whole file is not parsed up front
+SCHEMA_SAMPLE_ROWS = 100_000
+
+# Integer types from tightest to widest as (type, signed range, unsigned range)
+INTEGER_TYPES = [
+    ('TINYINT', (-2**7, 2**7 - 1), (0, 2**8 - 1)),
+    ('SMALLINT', (-2**15, 2**15 - 1), (0, 2**16 - 1)),
+    ('MEDIUMINT', (-2**23, 2**23 - 1), (0, 2**24 - 1)),
+    ('INT', (-2**31, 2**31 - 1), (0, 2**32 - 1)),
+    ('BIGINT', (-2**63, 2**63 - 1), (0, 2**64 - 1)),
+]
+
+# Date formats tried, in order, on string columns; the first one parsing every value wins
+DATE_FORMATS = [
+    ('%Y-%m-%d %H:%M:%S', 'DATETIME'),
+    ('%Y-%m-%dT%H:%M:%S', 'DATETIME'),
+    ('%Y-%m-%d %H:%M', 'DATETIME'),
+    ('%Y-%m-%d', 'DATE'),
+    ('%m/%d/%Y %H:%M:%S', 'DATETIME'),
+    ('%m/%d/%Y %H:%M', 'DATETIME'),
+    ('%m/%d/%Y', 'DATE'),
+    ('%d/%m/%Y', 'DATE'),
+]
+ISO_DATE_FORMATS = {'%Y-%m-%d %H:%M:%S', '%Y-%m-%d'}
+DATE_LIKE = re.compile(r'^\d{1,4}[-/]\d{1,2}[-/]\d{1,4}([ T]\d{1,2}:\d{2}(:\d{2})?)?$')
+ID_LIKE = re.compile(r'(^|_)id$', re.IGNORECASE)
+# Raw values pandas would parse as numbers, and those it would strip leading zeros from
+NUMBER_LIKE = re.compile(r'^[+-]?\d+(\.\d*)?$')
+LEADING_ZERO = re.compile(r'^[+-]?0\d')
+
+# Kinds of the MySQL type names an override may use; anything else holds strings
+TYPE_KINDS = {
+    **{name: 'integer' for name in ('TINYINT', 'SMALLINT', 'MEDIUMINT', 'INT', 'INTEGER',
+                                    'BIGINT', 'YEAR')},
+    **{name: 'decimal' for name in ('DECIMAL', 'DEC', 'NUMERIC', 'FIXED', 'FLOAT', 'DOUBLE',
+                                    'REAL')},
+    'BOOL': 'boolean',
+    'BOOLEAN': 'boolean',
+    'DATE': 'date',
+    'DATETIME': 'datetime',
+    'TIMESTAMP': 'datetime',
+}
+
+MAX_VARCHAR_LENGTH = 255
+MAX_DECIMAL_PRECISION = 38
+
+# Prefix length used when a TEXT column is part of a key
+TEXT_KEY_PREFIX = 255
+
+
+class ColumnSchema:
+    def __init__(self, name: str, mysql_type: str, kind: str, nullable: bool = True,
+                 date_format: Optional[str] = None, source: str = 'inferred',
+                 stats: Optional[dict] = None) -> None:
+        '''Describes one column: its MySQL type, kind and how raw values are parsed.'''
+        self.name = name
+        self.mysql_type = mysql_type
+        self.kind = kind
+        self.nullable = nullable
+        self.date_format = date_format
+        self.source = source
+        self.stats = stats or {}
+
+    def load_expression(self) -> str:
+        '''Returns the LOAD DATA expression converting the raw "{value}" into this column.'''
+        if self.kind == 'boolean':
+            return "IF({value} IN ('True', 'true', 'TRUE', '1'), 1, 0)"
+        if self.date_format and self.date_format not in ISO_DATE_FORMATS:
+            return f"STR_TO_DATE({{value}}, '{mysql_date_format(self.date_format)}')"
+        return '{value}'
+
+    def definition(self) -> str:
+        '''Returns the column definition used in CREATE TABLE.'''
+        null = '' if self.nullable else ' NOT NULL'
+        return f'{quote_identifier(self.name)} {self.mysql_type}{null}'
+
+    def key_part(self) -> str:
+        '''Returns the column as it appears in a key, with a prefix length for TEXT.'''
+        if self.mysql_type.upper().endswith('TEXT'):
+            return f'{quote_identifier(self.name)}({TEXT_KEY_PREFIX})'
+        return quote_identifier(self.name)
+
+
+class TableSchema:
+    def __init__(self, table_name: str, columns: List[ColumnSchema],
+                 primary_key: Optional[List[str]] = None,
+                 indexes: Optional[List[List[str]]] = None, sample: bool = False) -> None:
+        '''Holds the inferred columns of a table and the keys to build after loading.'''
+        self.table_name = table_name
+        self.columns = columns
+        self.primary_key = primary_key or []
+        self.indexes = indexes or []
+        self.sample = sample
+
+    def column(self, name: str) -> ColumnSchema:
+        return next(column for column in self.columns if column.name == name)
+
+    def key_parts(self, columns: List[str]) -> str:
+        '''Returns the comma-separated key parts for the given columns.'''
+        return ', '.join(self.column(name).key_part() for name in columns)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def definition(self) -> str:
+        '''Generates a MySQL-compatible column definition.'''
+        return ', '.join(column.definition() for column in self.columns)
+
+    def key_clauses(self, existing: Iterable[str] = ()) -> List[str]:
+        '''Returns the ALTER TABLE clauses adding every key not named in existing.'''
+        existing = set(existing)
+        clauses = []
+        if self.primary_key and 'PRIMARY' not in existing:
+            clauses.append(f'ADD PRIMARY KEY ({self.key_parts(self.primary_key)})')
+        for columns in self.indexes:
+            index_name = f'idx_{"_".join(columns)}'[:64]
+            if index_name not in existing:
+                clauses.append(
+                    f'ADD INDEX {quote_identifier(index_name)} ({self.key_parts(columns)})'
+                )
+        return clauses
+
+    def coerce(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Parses date columns stored in non-ISO formats so MySQL receives real dates.
+
+        Raises pd.errors.ParserError when a value does not match the column's date format
+        (the format was inferred from a sample), rather than loading it as NULL.
+        '''
+        for column in self.columns:
+            if column.date_format and column.date_format not in ISO_DATE_FORMATS:
+                values = df[column.name]
+                parsed = pd.to_datetime(values, format=column.date_format, errors='coerce')
+                invalid = parsed.isna() & values.notna()
+                if invalid.any():
+                    raise pd.errors.ParserError(
+                        f'{int(invalid.sum())} value(s) of column "{column.name}" do not match '
+                        f'its date format "{column.date_format}", e.g. '
+                        f'"{values[invalid].iloc[0]}"'
+                    )
+                df[column.name] = parsed
+        return df
+
+    def report(self) -> dict:
+        '''Returns what was chosen for each column and key, and why.'''
+        return {
+            'primary_key': self.primary_key,
+            'indexes': self.indexes,
+            'columns': [
+                {
+                    'column': column.name,
+                    'type': column.mysql_type,
+                    'nullable': column.nullable,
+                    'source': column.source,
+                    **({'date_format': column.date_format} if column.date_format else {}),
+                    **column.stats
+                }
+                for column in self.columns
+            ]
+        }
+
+    def write_report(self, reports_dir: Path = REPORTS_DIR / 'schema') -> Path:
+        '''Writes the schema report to reports/schema/<table>.json.'''
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        report_path = reports_dir / f'{self.table_name}.json'
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        return report_path
+
+
+def quote_identifier(name: str) -> str:
+    '''Quotes a column name for use in MySQL statements.'''
+    return '`' + str(name).replace('`', '``') + '`'
+
+def load_schema_overrides(path: Path = SCHEMA_OVERRIDES_FILE) -> dict:
+    '''Loads per-table overrides.
+
+    The file maps table names to column types and keys, e.g.
+    {"customers": {"columns": {"zip": "CHAR(5)"}, "primary_key": ["customer_id"],
+                   "indexes": [["customer_city"], ["customer_state", "customer_city"]]}}
+    '''
+    if not Path(path).exists():
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f'Error reading schema overrides "{path}": {e}')
+        return {}
+
+def infer_schema(df: pd.DataFrame, table_name: str, overrides: Optional[dict] = None,
+                 sample: bool = False) -> TableSchema:
+    '''Infers the tightest MySQL type for every column of the DataFrame.
+
+    With sample=True the DataFrame is only part of the data, so types get headroom:
+    integers are at least INT and signed, decimals and strings are widened, and no
+    column is declared NOT NULL.
+    '''
+    table_overrides = (overrides or {}).get(table_name, {})
+    column_overrides: Dict[str, str] = table_overrides.get('columns', {})
+    columns = []
+    for name in df.columns:
+        column = infer_column(df[name], sample)
+        if name in column_overrides:
+            apply_override(column, column_overrides[name])
+        columns.append(column)
+    primary_key = table_overrides.get('primary_key') or detect_primary_key(df, columns)
+    if isinstance(primary_key, str):
+        primary_key = [primary_key]
+    indexes = [
+        [index] if isinstance(index, str) else list(index)
+        for index in table_overrides.get('indexes', [])
+    ]
+    return TableSchema(table_name, columns, primary_key, indexes, sample)
+
+def apply_override(column: ColumnSchema, mysql_type: str) -> None:
+    '''Gives the column the overridden type and the kind of values that type holds.
+
+    Parsers and converters dispatch on kind, so it follows the override; an inferred date
+    format is only kept while the column stays a date.
+    '''
+    kind = type_kind(mysql_type)
+    if kind not in ('date', 'datetime') or column.kind not in ('date', 'datetime'):
+        column.date_format = None
+    column.mysql_type = mysql_type
+    column.kind = kind
+    column.source = 'override'
+
+def type_kind(mysql_type: str) -> str:
+    '''Returns the kind of values a MySQL type holds.'''
+    normalized = mysql_type.strip().upper()
+    if normalized.replace(' ', '').startswith('TINYINT(1)'):
+        return 'boolean'
+    name = re.match(r'[A-Z]*', normalized).group(0)
+    return TYPE_KINDS.get(name, 'string')
+
+def csv_dtypes(csv_file: str, **read_options) -> Dict[str, type]:
+    '''Returns read_csv dtypes keeping zero-padded number columns (zip codes, ...) as text.
+
+    Read as numbers, their leading zeros would be gone before the schema is inferred, so
+    a sample of the raw strings decides.
+    '''
+    with open_csv(csv_file) as source:
+        sample = pd.read_csv(source, nrows=SCHEMA_SAMPLE_ROWS, dtype=str, **read_options)
+    dtypes = {}
+    for name in sample.columns:
+        values = sample[name].dropna()
+        if values.str.match(NUMBER_LIKE).all() and values.str.match(LEADING_ZERO).any():
+            dtypes[name] = str
+    return dtypes
+
+def detect_primary_key(df: pd.DataFrame, columns: List[ColumnSchema]) -> Optional[List[str]]:
+    '''Returns the first ID-like column that is unique and never null.'''
+    for column in columns:
+        if not ID_LIKE.search(str(column.name)) or column.mysql_type.upper().endswith('TEXT'):
+            continue
+        values = df[column.name]
+        if values.notna().all() and values.is_unique:
+            return [column.name]
+    return None
+
+def infer_column(series: pd.Series, sample: bool = False) -> ColumnSchema:
+    '''Maps a column's dtype and value range to a MySQL type.'''
+    name = series.name
+    values = series.dropna()
+    nullable = sample or len(values) < len(series)
+    stats = {'dtype': str(series.dtype), 'nulls': int(len(series) - len(values))}
+    if values.empty:
+        return ColumnSchema(name, f'VARCHAR({MAX_VARCHAR_LENGTH})', 'string', True, stats=stats)
+
+    # A flag column with empty cells is read as object dtype holding bools and NaN
+    if pd.api.types.is_bool_dtype(series) or \
+            pd.api.types.infer_dtype(values, skipna=True) == 'boolean':
+        return ColumnSchema(name, 'TINYINT(1)', 'boolean', nullable, stats=stats)
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return ColumnSchema(name, 'DATETIME', 'datetime', nullable, stats=stats)
+
+    if pd.api.types.is_numeric_dtype(series):
+        numbers = values.to_numpy()
+        stats.update({'min': numbers.min().item(), 'max': numbers.max().item()})
+        if pd.api.types.is_integer_dtype(series) or np.all(np.mod(numbers, 1) == 0):
+            if np.all(np.isfinite(numbers)):
+                mysql_type = integer_type(int(numbers.min()), int(numbers.max()), sample)
+                return ColumnSchema(name, mysql_type, 'integer', nullable, stats=stats)
+        return ColumnSchema(name, decimal_type(values, sample), 'decimal', nullable, stats=stats)
+
+    strings = values.astype(str)
+    date_format, date_type = detect_date_format(strings)
+    if date_format:
+        return ColumnSchema(name, date_type, date_type.lower(), nullable, date_format, stats=stats)
+
+    lengths = strings.str.len()
+    stats.update({'min_length': int(lengths.min()), 'max_length': int(lengths.max())})
+    return ColumnSchema(
+        name, string_type(int(lengths.min()), int(lengths.max()), sample), 'string', nullable,
+        stats=stats
+    )
+
+def integer_type(minimum: int, maximum: int, sample: bool = False) -> str:
+    '''Returns the smallest integer type holding [minimum, maximum].'''
+    unsigned = minimum >= 0 and not sample
+    for mysql_type, signed_range, unsigned_range in INTEGER_TYPES:
+        if sample and mysql_type in ('TINYINT', 'SMALLINT', 'MEDIUMINT'):
+            continue
+        low, high = unsigned_range if unsigned else signed_range
+        if low <= minimum and maximum <= high:
+            return f'{mysql_type} UNSIGNED' if unsigned else mysql_type
+    return 'DECIMAL(65, 0)'
+
+def decimal_type(values: pd.Series, sample: bool = False) -> str:
+    '''Returns a DECIMAL wide enough for every value, or DOUBLE when none is exact.'''
+    numbers = values.to_numpy(dtype=float)
+    if not np.all(np.isfinite(numbers)):
+        return 'DOUBLE'
+    # repr gives the shortest string that round-trips, so its digits are the real precision
+    text = pd.Series([repr(number) for number in np.unique(numbers).tolist()])
+    if text.str.contains('e', regex=False).any():
+        return 'DOUBLE'
+    parts = text.str.lstrip('-').str.split('.', n=1, expand=True)
+    integer_digits = int(parts[0].str.lstrip('0').str.len().max() or 1)
+    scale = int(parts[1].str.rstrip('0').str.len().max()) if parts.shape[1] > 1 else 0
+    if sample:
+        integer_digits += 2
+    precision = max(integer_digits + scale, 1)
+    if precision > MAX_DECIMAL_PRECISION:
+        return 'DOUBLE'
+    return f'DECIMAL({precision}, {scale})'
+
+def detect_date_format(strings: pd.Series) -> tuple:
+    '''Returns (format, DATE or DATETIME) when every value parses as a date, else (None, None).'''
+    if not DATE_LIKE.match(strings.iloc[0]) or not strings.str.match(DATE_LIKE).all():
+        return None, None
+    for date_format, date_type in DATE_FORMATS:
+        parsed = pd.to_datetime(strings, format=date_format, errors='coerce')
+        if parsed.notna().all():
+            return date_format, date_type
+    return None, None
+
+def string_type(min_length: int, max_length: int, sample: bool = False) -> str:
+    '''Returns CHAR for fixed-width values, a tight VARCHAR, or TEXT for long values.'''
+    if sample:
+        max_length = max(2 * max_length, 32)
+    elif min_length == max_length and 0 < max_length <= MAX_VARCHAR_LENGTH:
+        return f'CHAR({max_length})'
+    if max_length <= MAX_VARCHAR_LENGTH:
+        return f'VARCHAR({max_length})'
+    if max_length <= 16383:
+        return 'TEXT'
+    return 'MEDIUMTEXT'
+
+def mysql_date_format(date_format: str) -> str:
+    '''Translates a strptime format into the MySQL STR_TO_DATE equivalent.'''
+    return date_format.replace('%M', '%i')
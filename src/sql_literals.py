@@ -0,0 +1,73 @@
+import math
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Iterator, List
+
+import numpy as np
+from mysql.connector import Error
+
+# Bytes kept free in each multi-row VALUES statement for the packet header and command byte
+PACKET_HEADROOM = 1024
+
+# Escapes applied to string literals unless the server runs with NO_BACKSLASH_ESCAPES
+BACKSLASH_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    "'": "\\'",
+    '\0': '\\0',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\x1a': '\\Z'
+})
+
+
+def values_statements(table_name: str, rows: List[tuple], max_allowed_packet: int,
+                      backslash_escapes: bool = True, suffix: str = '') -> Iterator[str]:
+    '''Yields multi-row INSERT statements of the rows, each fitting in max_allowed_packet.'''
+    limit = max_allowed_packet - PACKET_HEADROOM - len(suffix.encode('utf-8'))
+    prefix = f'INSERT INTO {table_name} VALUES '
+    prefix_size = len(prefix.encode('utf-8'))
+    batch, batch_size = [], prefix_size
+    for index, row in enumerate(rows):
+        values = '(' + ', '.join(format_sql_literal(value, backslash_escapes) for value in row) + ')'
+        values_size = len(values.encode('utf-8')) + 1
+        if prefix_size + values_size > limit:
+            raise Error(
+                msg=f'Row {index} of the batch for {table_name} is {values_size:,} bytes as SQL, '
+                    f'too large for max_allowed_packet ({max_allowed_packet:,} bytes).'
+            )
+        if batch and batch_size + values_size > limit:
+            yield prefix + ','.join(batch) + suffix
+            batch, batch_size = [], prefix_size
+        batch.append(values)
+        batch_size += values_size
+    if batch:
+        yield prefix + ','.join(batch) + suffix
+
+def format_sql_literal(value: Any, backslash_escapes: bool = True) -> str:
+    '''Renders a Python value as a MySQL literal for client-built statements.'''
+    if value is None:
+        return 'NULL'
+    if isinstance(value, np.generic):
+        # numpy scalars, before the float check: np.float64 subclasses float but reprs as
+        # np.float64(...) under NumPy 2
+        return format_sql_literal(value.item(), backslash_escapes)
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else 'NULL'
+    if isinstance(value, Decimal):
+        return str(value) if value.is_finite() else 'NULL'
+    if isinstance(value, (bytes, bytearray)):
+        return f"X'{bytes(value).hex()}'"
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S.%f')
+    elif isinstance(value, (date, time)):
+        value = value.isoformat()
+    elif isinstance(value, timedelta):
+        value = str(value)
+    value = str(value)
+    if backslash_escapes:
+        return "'" + value.translate(BACKSLASH_ESCAPES) + "'"
+    return "'" + value.replace("'", "''") + "'"
@@ -0,0 +1,380 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+import duckdb
+import pandas as pd
+from loguru import logger
+
+from src.config import DATA_DIR
+from src.rows import frame_rows
+from src.schema import ISO_DATE_FORMATS, ColumnSchema, TableSchema
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Constants
+SQLITE_DATABASE = Path(os.environ.get('SQLITE_DATABASE', DATA_DIR / 'customers.sqlite'))
+DUCKDB_DATABASE = Path(os.environ.get('DUCKDB_DATABASE', DATA_DIR / 'customers.duckdb'))
+
+# Bulk-load settings applied to every SQLite connection: WAL so readers are not blocked,
+# commits that wait for the OS rather than the disk, and a large page cache and mmap
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -256 * 1024,  # KiB
+    'mmap_size': 1024**3
+}
+
+# MySQL integer types and their DuckDB equivalents, signed and unsigned
+DUCKDB_INTEGER_TYPES = {
+    'TINYINT': ('TINYINT', 'UTINYINT'),
+    'SMALLINT': ('SMALLINT', 'USMALLINT'),
+    'MEDIUMINT': ('INTEGER', 'UINTEGER'),
+    'INT': ('INTEGER', 'UINTEGER'),
+    'INTEGER': ('INTEGER', 'UINTEGER'),
+    'BIGINT': ('BIGINT', 'UBIGINT'),
+}
+DECIMAL_TYPE = re.compile(r'^DECIMAL\(\s*(\d+)\s*,\s*(\d+)\s*\)$', re.IGNORECASE)
+DUCKDB_MAX_DECIMAL_PRECISION = 38
+
+Batch = Union[pd.DataFrame, 'pa.RecordBatch']
+
+
+class StorageBackend:
+    '''Interface of the databases the CSV pipeline can load into.
+
+    A backend connects, creates a table from an inferred TableSchema, bulk-inserts
+    batches (DataFrames or Arrow record batches) the fastest way it can, swaps a staging
+    table in for a live one and closes. The batches of one load are inserted between
+    prepare and finish, which a backend can use to write them in a single transaction.
+    Backends that can ingest a CSV file natively set native_csv and implement load_csv,
+    listing in native_compressions the compressed files it reads itself; other
+    compressed files are streamed in batches. Errors are logged and reported as
+    None/False, like MySQLDatabaseManager does.
+    '''
+    name = ''
+    native_csv = False
+    native_compressions: Tuple[str, ...] = ()
+
+    def connect(self) -> bool:
+        '''Opens the connection; returns whether it succeeded.'''
+        raise NotImplementedError
+
+    def create_table(self, table_name: str, schema: TableSchema) -> None:
+        '''Creates the table with the schema's columns, mapped to the backend's types.'''
+        raise NotImplementedError
+
+    def insert_batch(self, table_name: str, batch: Batch,
+                     schema: Optional[TableSchema] = None) -> Optional[int]:
+        '''Inserts a batch of rows and returns how many, or None on error.'''
+        raise NotImplementedError
+
+    def prepare(self, table_name: str) -> None:
+        '''Called before the batches of a load are inserted.'''
+
+    def finish(self, table_name: str, commit: bool = True) -> bool:
+        '''Called after the last batch; keeps the load's writes, or discards them (commit=False).
+
+        Returns whether the writes were kept.
+        '''
+        return commit
+
+    def load_csv(self, table_name: str, file_path: str, schema: TableSchema) -> Optional[int]:
+        '''Loads a whole CSV file into the table natively; only when native_csv is set.'''
+        raise NotImplementedError
+
+    def drop_table(self, table_name: str) -> None:
+        '''Drops the table if it exists.'''
+        raise NotImplementedError
+
+    def count_rows(self, table_name: str) -> Optional[int]:
+        '''Returns the number of rows in the table.'''
+        raise NotImplementedError
+
+    def swap_table(self, staging_table: str, table_name: str) -> bool:
+        '''Replaces the table with the staging table atomically.'''
+        raise NotImplementedError
+
+    def close(self) -> None:
+        '''Closes the connection.'''
+        raise NotImplementedError
+
+
+class SQLiteBackend(StorageBackend):
+    name = 'sqlite'
+
+    def __init__(self, path: Path = SQLITE_DATABASE, pragmas: Optional[dict] = None) -> None:
+        '''Loads into a SQLite file, each load in one transaction and each batch in one
+        executemany.
+
+        Batches are converted with frame_rows, so dates arrive as ISO strings and DECIMAL
+        columns as exact strings that SQLite's NUMERIC affinity stores as numbers.
+        '''
+        self.path = Path(path)
+        self.pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> bool:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit mode; transactions are opened explicitly around each load
+            self.connection = sqlite3.connect(self.path, isolation_level=None)
+            for pragma, value in self.pragmas.items():
+                self.connection.execute(f'PRAGMA {pragma} = {value}')
+            logger.info(f'Successfully opened SQLite database "{self.path}".')
+            return True
+        except sqlite3.Error as e:
+            logger.error(f'Error opening SQLite database "{self.path}": {e}')
+            self.connection = None
+            return False
+
+    def create_table(self, table_name: str, schema: TableSchema) -> None:
+        columns = ', '.join(
+            f'{quote_name(column.name)} {sqlite_type(column)}'
+            f'{"" if column.nullable else " NOT NULL"}'
+            for column in schema.columns
+        )
+        try:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {quote_name(table_name)} ({columns})')
+            logger.info(f'Table "{table_name}" created or exists already.')
+        except sqlite3.Error as e:
+            logger.error(f'Error creating table {table_name}: {e}')
+
+    def insert_batch(self, table_name: str, batch: Batch,
+                     schema: Optional[TableSchema] = None) -> Optional[int]:
+        if not isinstance(batch, pd.DataFrame):
+            # Through frame_rows too, so dates and timestamps become ISO strings
+            batch = batch.to_pandas(types_mapper=pd.ArrowDtype)
+        rows = frame_rows(batch, schema)
+        placeholders = ', '.join(['?'] * len(batch.columns))
+        # Outside prepare/finish the batch gets a transaction of its own
+        own_transaction = not self.connection.in_transaction
+        try:
+            if own_transaction:
+                self.connection.execute('BEGIN')
+            self.connection.executemany(
+                f'INSERT INTO {quote_name(table_name)} VALUES ({placeholders})', rows
+            )
+            if own_transaction:
+                self.connection.execute('COMMIT')
+            return len(rows)
+        except (sqlite3.Error, OverflowError) as e:
+            # OverflowError: an integer beyond SQLite's 64-bit range
+            if own_transaction and self.connection.in_transaction:
+                self.connection.execute('ROLLBACK')
+            logger.error(f'Error inserting data into {table_name}: {e}')
+            return None
+
+    def prepare(self, table_name: str) -> None:
+        # One transaction per load: a commit per batch would wait on the WAL each time
+        try:
+            self.connection.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            logger.error(f'Error starting the load of {table_name}: {e}')
+
+    def finish(self, table_name: str, commit: bool = True) -> bool:
+        if not self.connection.in_transaction:
+            return commit
+        try:
+            self.connection.execute('COMMIT' if commit else 'ROLLBACK')
+            return commit
+        except sqlite3.Error as e:
+            logger.error(f'Error committing the load of {table_name}: {e}')
+            if self.connection.in_transaction:
+                self.connection.execute('ROLLBACK')
+            return False
+
+    def drop_table(self, table_name: str) -> None:
+        try:
+            self.connection.execute(f'DROP TABLE IF EXISTS {quote_name(table_name)}')
+        except sqlite3.Error as e:
+            logger.error(f'Error dropping table {table_name}: {e}')
+
+    def count_rows(self, table_name: str) -> Optional[int]:
+        try:
+            return self.connection.execute(
+                f'SELECT COUNT(*) FROM {quote_name(table_name)}'
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f'Error counting rows of {table_name}: {e}')
+            return None
+
+    def swap_table(self, staging_table: str, table_name: str) -> bool:
+        # SQLite DDL is transactional, so readers see either the old or the new table
+        try:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute(f'DROP TABLE IF EXISTS {quote_name(table_name)}')
+            self.connection.execute(
+                f'ALTER TABLE {quote_name(staging_table)} RENAME TO {quote_name(table_name)}'
+            )
+            self.connection.execute('COMMIT')
+            logger.info(f'Swapped "{staging_table}" in as "{table_name}".')
+            return True
+        except sqlite3.Error as e:
+            if self.connection.in_transaction:
+                self.connection.execute('ROLLBACK')
+            logger.error(f'Error swapping {staging_table} in as {table_name}: {e}')
+            return False
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class DuckDBBackend(StorageBackend):
+    name = 'duckdb'
+    native_csv = True
+    native_compressions = ('gzip', 'zstd')
+
+    def __init__(self, path: Union[Path, str] = DUCKDB_DATABASE,
+                 threads: Optional[int] = None) -> None:
+        '''Loads into a DuckDB file (or ":memory:") with its own vectorized readers.
+
+        Whole CSV files go through DuckDB's parallel CSV reader; batches are registered
+        as views over the DataFrame or Arrow data and copied in with one INSERT ... SELECT,
+        so no row is converted in Python.
+        '''
+        self.path = path
+        self.threads = threads
+        self.connection = None
+
+    def connect(self) -> bool:
+        try:
+            if str(self.path) != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self.connection = duckdb.connect(str(self.path))
+            if self.threads:
+                self.connection.execute(f'SET threads = {int(self.threads)}')
+            logger.info(f'Successfully opened DuckDB database "{self.path}".')
+            return True
+        except duckdb.Error as e:
+            logger.error(f'Error opening DuckDB database "{self.path}": {e}')
+            self.connection = None
+            return False
+
+    def create_table(self, table_name: str, schema: TableSchema) -> None:
+        columns = ', '.join(
+            f'{quote_name(column.name)} {duckdb_type(column)}'
+            f'{"" if column.nullable else " NOT NULL"}'
+            for column in schema.columns
+        )
+        try:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {quote_name(table_name)} ({columns})')
+            logger.info(f'Table "{table_name}" created or exists already.')
+        except duckdb.Error as e:
+            logger.error(f'Error creating table {table_name}: {e}')
+
+    def insert_batch(self, table_name: str, batch: Batch,
+                     schema: Optional[TableSchema] = None) -> Optional[int]:
+        try:
+            self.connection.register('batch_view', batch)
+            try:
+                self.connection.execute(
+                    f'INSERT INTO {quote_name(table_name)} SELECT * FROM batch_view'
+                )
+            finally:
+                self.connection.unregister('batch_view')
+            return len(batch)
+        except duckdb.Error as e:
+            logger.error(f'Error inserting data into {table_name}: {e}')
+            return None
+
+    def load_csv(self, table_name: str, file_path: str, schema: TableSchema) -> Optional[int]:
+        # Read every field as text and cast in SQL, so the inferred schema (not DuckDB's
+        # own sniffing) decides the types and non-ISO dates are parsed with their format
+        select = ', '.join(duckdb_expression(column) for column in schema.columns)
+        try:
+            (rows,) = self.connection.execute(
+                f'INSERT INTO {quote_name(table_name)} SELECT {select} '
+                f'FROM read_csv(?, header = true, all_varchar = true)',
+                [str(file_path)]
+            ).fetchone()
+            logger.info(f'Loaded {rows} rows from "{file_path}" with DuckDB.')
+            return rows
+        except duckdb.Error as e:
+            logger.error(f'Error loading "{file_path}" into {table_name}: {e}')
+            return None
+
+    def drop_table(self, table_name: str) -> None:
+        try:
+            self.connection.execute(f'DROP TABLE IF EXISTS {quote_name(table_name)}')
+        except duckdb.Error as e:
+            logger.error(f'Error dropping table {table_name}: {e}')
+
+    def count_rows(self, table_name: str) -> Optional[int]:
+        try:
+            return self.connection.execute(
+                f'SELECT COUNT(*) FROM {quote_name(table_name)}'
+            ).fetchone()[0]
+        except duckdb.Error as e:
+            logger.error(f'Error counting rows of {table_name}: {e}')
+            return None
+
+    def swap_table(self, staging_table: str, table_name: str) -> bool:
+        try:
+            self.connection.execute('BEGIN TRANSACTION')
+            self.connection.execute(f'DROP TABLE IF EXISTS {quote_name(table_name)}')
+            self.connection.execute(
+                f'ALTER TABLE {quote_name(staging_table)} RENAME TO {quote_name(table_name)}'
+            )
+            self.connection.execute('COMMIT')
+            logger.info(f'Swapped "{staging_table}" in as "{table_name}".')
+            return True
+        except duckdb.Error as e:
+            self.connection.execute('ROLLBACK')
+            logger.error(f'Error swapping {staging_table} in as {table_name}: {e}')
+            return False
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def quote_name(name: str) -> str:
+    '''Quotes an identifier for SQLite and DuckDB statements.'''
+    return '"' + str(name).replace('"', '""') + '"'
+
+def sqlite_type(column: ColumnSchema) -> str:
+    '''Returns the SQLite type whose affinity stores the column's values natively.'''
+    if column.kind in ('integer', 'boolean'):
+        return 'INTEGER'
+    if column.kind == 'decimal':
+        return 'REAL' if column.mysql_type.upper() == 'DOUBLE' else 'NUMERIC'
+    return 'TEXT'
+
+def duckdb_type(column: ColumnSchema) -> str:
+    '''Maps the column's MySQL type to the DuckDB type holding the same values.'''
+    mysql_type = column.mysql_type.upper()
+    base_type = mysql_type.split('(')[0].split()[0]
+    decimal = DECIMAL_TYPE.match(mysql_type)
+    if column.kind == 'boolean':
+        return 'BOOLEAN'
+    if column.kind == 'date':
+        return 'DATE'
+    if column.kind == 'datetime':
+        return 'TIMESTAMP'
+    if base_type in DUCKDB_INTEGER_TYPES:
+        signed, unsigned = DUCKDB_INTEGER_TYPES[base_type]
+        return unsigned if mysql_type.endswith('UNSIGNED') else signed
+    if decimal:
+        if int(decimal.group(1)) <= DUCKDB_MAX_DECIMAL_PRECISION:
+            return f'DECIMAL({decimal.group(1)}, {decimal.group(2)})'
+        # Integers too wide for BIGINT are inferred as DECIMAL(65, 0)
+        return 'HUGEINT' if decimal.group(2) == '0' else 'DOUBLE'
+    if base_type in ('DOUBLE', 'FLOAT', 'REAL'):
+        return 'DOUBLE'
+    return 'VARCHAR'
+
+def duckdb_expression(column: ColumnSchema) -> str:
+    '''Returns the SQL turning the column's raw CSV text into its DuckDB type.'''
+    name = quote_name(column.name)
+    if column.date_format and column.date_format not in ISO_DATE_FORMATS:
+        return f"CAST(strptime({name}, '{column.date_format}') AS {duckdb_type(column)})"
+    return f'CAST({name} AS {duckdb_type(column)})'
+
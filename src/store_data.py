@@ -1,13 +1,36 @@
 import os
+import threading
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from dotenv import load_dotenv
 import mysql.connector
 import pandas as pd
 from mysql.connector import Error
-from pathlib import Path
-from src.config import EXTERNAL_DATA_DIR
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool
+from src.checkpoint import LoadCheckpoints
+from src.compressed_csv import open_csv, strip_compression
+from src.config import EXTERNAL_DATA_DIR, env_flag
+from src.delta import hash_table_name
+from src.load_arrow import load_csv_arrow
+from src.load_chunked import load_csv_chunked, resume_point
+from src.load_delta import delta_key, load_csv_delta, store_row_hashes
+from src.load_infile import load_csv_infile
+from src.load_pipelined import load_csv_pipelined
+from src.loading import (CSV_ERRORS, get_table_name, infer_table_schema, load_result,
+                         log_csv_error, log_load_summary, staging_table_name, swap_in)
+from src.manifest import LoadManifest
+from src.metrics import LOAD_METRICS, FileMetrics, RunMetrics, stage_timer, timed_iter
+from src.memory import log_memory_report, optimize_dtypes, write_memory_report
+from src.parquet_cache import ParquetCache
+from src.rows import frame_rows
+from src.schema import (TableSchema, csv_dtypes, infer_schema, load_schema_overrides,
+                        quote_identifier)
+from src.sql_literals import values_statements
 from loguru import logger
 from logs.log_config import configure_logging
-from typing import Optional, List
+from typing import Any, Iterator, Optional, List, Sequence, Tuple
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,92 +40,821 @@ MYSQL_HOST = os.environ.get('MYSQL_HOST')
 MYSQL_USERNAME = os.environ.get('MYSQL_USERNAME')
 MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD')
 MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE')
+LOAD_BACKEND = os.environ.get('LOAD_BACKEND', 'mysql')
+LOAD_ENGINE = os.environ.get('LOAD_ENGINE', 'pandas')
+INSERT_METHOD = os.environ.get('INSERT_METHOD', 'executemany')
+INSERT_BATCH_SIZE = int(os.environ.get('INSERT_BATCH_SIZE', 5000))
+LOAD_WORKERS = int(os.environ.get('LOAD_WORKERS', 1))
+LOAD_MODE = os.environ.get('LOAD_MODE', 'replace')
+DELETE_MISSING_ROWS = env_flag('DELETE_MISSING_ROWS')
+INCREMENTAL_LOAD = env_flag('INCREMENTAL_LOAD', True)
+LOAD_CHUNKSIZE = int(os.environ.get('LOAD_CHUNKSIZE', 0)) or None
+PIPELINE_CONSUMERS = int(os.environ.get('PIPELINE_CONSUMERS', 0))
+PIPELINE_QUEUE_DEPTH = int(os.environ.get('PIPELINE_QUEUE_DEPTH', 4))
+BULK_LOAD_SESSION = env_flag('BULK_LOAD_SESSION', True)
+BULK_COMMIT_ROWS = int(os.environ.get('BULK_COMMIT_ROWS', 100_000))
+OPTIMIZE_MEMORY = env_flag('OPTIMIZE_MEMORY')
+PARQUET_CACHE = env_flag('PARQUET_CACHE')
+# Checkpoints each chunk and retries transient errors (see src.retry); pandas engine only
+RESUMABLE_LOAD = env_flag('RESUMABLE_LOAD')
+MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 0)) or None
 
 
 class MySQLDatabaseManager:
-    def __init__(self, host: str, user: str, password: str, database: str) -> None:
-        '''Initializes the database connection.'''
-        try:
-            self.connection = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database
-            )
-            if self.connection.is_connected():
-                logger.info('Successfully connected to the database.')
+    def __init__(self, host: str, user: str, password: str, database: str,
+                 allow_local_infile: bool = False, pool_size: Optional[int] = None,
+                 pool_timeout: float = 30.0) -> None:
+        '''Initializes the database connection, or a connection pool when pool_size is set.'''
+        self._server_settings = {}
+        self._local = threading.local()
+        # FileMetrics of the load in progress, set by the loader
+        self.metrics: Optional[FileMetrics] = None
+        self.connection = None
+        self.pool = None
+        self.pool_timeout = pool_timeout
+        # Pooled connections checked out by a thread, so close() can reach them
+        self._pinned = set()
+        self._pinned_lock = threading.Lock()
+        # Set after an error on the single connection, which is then pinged before next use
+        self._ping_needed = False
+        connection_settings = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'database': database,
+            'allow_local_infile': allow_local_infile
+        }
+        try:
+            if pool_size:
+                self.pool = MySQLConnectionPool(
+                    pool_name=f'{database}_{id(self)}',
+                    pool_size=pool_size,
+                    **connection_settings
+                )
+                logger.info(f'Successfully created a pool of {pool_size} database connections.')
+            else:
+                self.connection = mysql.connector.connect(**connection_settings)
+                if self.connection.is_connected():
+                    logger.info('Successfully connected to the database.')
         except Error as e:
             logger.error(f'Error connecting to MySQL: {e}')
             self.connection = None
+            self.pool = None
+
+    def is_connected(self) -> bool:
+        '''Returns whether a connection or connection pool is available.'''
+        return self.pool is not None or self.connection is not None
+
+    @contextmanager
+    def get_connection(self) -> Iterator[Any]:
+        '''Yields a live connection, reconnecting it first if it has gone stale.'''
+        # Nested calls on one thread reuse the held connection, so its session state is kept
+        if getattr(self._local, 'connection', None) is not None:
+            yield self._local.connection
+            return
+        pooled = self.pool is not None
+        if pooled:
+            connection = self._checkout()
+            with self._pinned_lock:
+                self._pinned.add(connection)
+        else:
+            connection = self.connection
+            # Only pinged after an operation on it failed, not on every call
+            if self._ping_needed:
+                connection.ping(reconnect=True, attempts=3, delay=1)
+                self._ping_needed = False
+        try:
+            self._local.connection = connection
+            yield connection
+        except Error:
+            if not pooled:
+                self._ping_needed = True
+            raise
+        finally:
+            self._local.connection = None
+            if pooled:
+                with self._pinned_lock:
+                    # close() may have closed it already
+                    released = connection in self._pinned
+                    self._pinned.discard(connection)
+                if released:
+                    connection.close()
+
+    def _checkout(self) -> Any:
+        '''Takes a connection from the pool, waiting up to pool_timeout for one to free up.'''
+        deadline = timer.monotonic() + self.pool_timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if timer.monotonic() >= deadline:
+                    raise
+                timer.sleep(0.05)
     
     def create_table(self, table_name: str, columns: str) -> None:
         '''Creates a table with the specified columns.'''
         create_table_query = f'CREATE TABLE IF NOT EXISTS {table_name} ({columns});'
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(create_table_query)
-            cursor.close()
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(create_table_query)
+                cursor.close()
             logger.info(f'Table "{table_name}" created or exists already.')
         except Error as e:
             logger.error(f'Error creating table {table_name}: {e}')
+
+    def drop_table(self, table_name: str) -> None:
+        '''Drops the table if it exists.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+                cursor.close()
+            logger.info(f'Table "{table_name}" dropped.')
+        except Error as e:
+            logger.error(f'Error dropping table {table_name}: {e}')
+
+    def count_rows(self, table_name: str) -> Optional[int]:
+        '''Returns the number of rows in the table.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor(buffered=True)
+                cursor.execute(f'SELECT COUNT(*) FROM {table_name}')
+                (count,) = cursor.fetchone()
+                cursor.close()
+            return count
+        except Error as e:
+            logger.error(f'Error counting rows of {table_name}: {e}')
+            return None
+
+    def swap_table(self, staging_table: str, table_name: str) -> bool:
+        '''Replaces the table with the staging table in a single atomic RENAME TABLE.'''
+        old_table = f'{table_name}__old'
+        self.drop_table(old_table)
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                if self.table_exists(table_name):
+                    cursor.execute(
+                        f'RENAME TABLE {table_name} TO {old_table}, {staging_table} TO {table_name}'
+                    )
+                else:
+                    cursor.execute(f'RENAME TABLE {staging_table} TO {table_name}')
+                cursor.close()
+            logger.info(f'Swapped "{staging_table}" in as "{table_name}".')
+        except Error as e:
+            logger.error(f'Error swapping {staging_table} in as {table_name}: {e}')
+            return False
+        self.drop_table(old_table)
+        return True
+
+    def table_exists(self, table_name: str) -> bool:
+        '''Returns whether the table exists in the current database.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor(buffered=True)
+                cursor.execute('SHOW TABLES LIKE %s', (table_name,))
+                exists = cursor.fetchone() is not None
+                cursor.close()
+            return exists
+        except Error as e:
+            logger.error(f'Error checking whether table {table_name} exists: {e}')
+            return False
     
-    def insert_data(self, table_name: str, data: pd.DataFrame) -> None:
-        '''Inserts data into the specified table.'''
-        placeholders = ', '.join(['%s'] * len(data.columns))
-        insert_query = f'INSERT INTO {table_name} VALUES ({placeholders})'
-        try:
-            cursor = self.connection.cursor()
-            for _, row in data.iterrows():
-                cursor.execute(insert_query, tuple(row))
-            self.connection.commit()
-            cursor.close()
+    @contextmanager
+    def bulk_load_session(self, table_name: Optional[str] = None,
+                          commit_interval: int = BULK_COMMIT_ROWS,
+                          foreign_key_checks: bool = True) -> Iterator[Any]:
+        '''Pins a connection with autocommit and unique checks off for the duration of a load.'''
+        with self.get_connection() as connection:
+            cursor = connection.cursor(buffered=True)
+            cursor.execute('SELECT @@autocommit, @@unique_checks, @@foreign_key_checks')
+            saved_settings = cursor.fetchone()
+            # With checks off InnoDB would not catch duplicates, so only before keys exist;
+            # foreign_key_checks=False is only safe for a table the load creates or replaces
+            unique_checks = bool(table_name) and self.has_unique_index(table_name)
+            cursor.execute(
+                'SET autocommit = 0, unique_checks = %s, foreign_key_checks = %s',
+                (int(unique_checks), int(foreign_key_checks and saved_settings[2]))
+            )
+            self._local.commit_interval = commit_interval
+            self._local.pending_rows = 0
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                self._local.commit_interval = None
+                cursor.execute(
+                    'SET autocommit = %s, unique_checks = %s, foreign_key_checks = %s',
+                    tuple(int(value) for value in saved_settings)
+                )
+                cursor.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        '''Pins a connection and commits everything written in the block together on exit.'''
+        with self.get_connection() as connection:
+            deferred = getattr(self._local, 'defer_commits', False)
+            self._local.defer_commits = True
+            try:
+                # Explicit, so the block stays atomic even if a reconnect reset autocommit
+                if not connection.in_transaction:
+                    connection.start_transaction()
+                yield connection
+                connection.commit()
+                self._local.pending_rows = 0
+            except BaseException:
+                try:
+                    connection.rollback()
+                except Error:
+                    # The connection is gone; the server has rolled the transaction back
+                    pass
+                raise
+            finally:
+                self._local.defer_commits = deferred
+
+    def reconnect(self) -> None:
+        '''Re-establishes this thread's connection after a transient error.'''
+        connection = getattr(self._local, 'connection', None) or self.connection
+        if connection is not None:
+            connection.ping(reconnect=True, attempts=3, delay=1)
+
+    def commit(self, connection: Any, rows: int) -> None:
+        '''Commits after a write, or every commit_interval rows inside a bulk load session.'''
+        # Inside a transaction block nothing is committed until the block ends
+        if getattr(self._local, 'defer_commits', False):
+            return
+        commit_interval = getattr(self._local, 'commit_interval', None)
+        if not commit_interval:
+            connection.commit()
+            return
+        self._local.pending_rows += max(rows, 0)
+        if self._local.pending_rows >= commit_interval:
+            connection.commit()
+            self._local.pending_rows = 0
+
+    def has_unique_index(self, table_name: str) -> bool:
+        '''Returns whether the table exists and has a primary key or unique index.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f'SHOW INDEX FROM {table_name} WHERE Non_unique = 0')
+                unique = bool(cursor.fetchall())
+                cursor.close()
+            return unique
+        except Error:
+            # The table does not exist yet
+            return False
+
+    def add_keys(self, table_name: str, schema: TableSchema) -> Optional[float]:
+        '''Builds the missing keys in one ALTER TABLE pass and returns the seconds it took.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f'SHOW INDEX FROM {table_name}')
+                existing = {row[2] for row in cursor.fetchall()}
+                clauses = schema.key_clauses(existing)
+                if not clauses:
+                    cursor.close()
+                    return 0.0
+                start = timer.perf_counter()
+                cursor.execute(f'ALTER TABLE {table_name} {", ".join(clauses)}')
+                seconds = timer.perf_counter() - start
+                cursor.close()
+            logger.info(f'Built {len(clauses)} key(s) on "{table_name}" in {seconds:.2f}s.')
+            return seconds
+        except Error as e:
+            logger.error(f'Error building keys on {table_name}: {e}')
+            return None
+
+    def is_unique(self, table_name: str, columns: List[str]) -> bool:
+        '''Checks that the columns hold no NULLs and no duplicate values in the table.'''
+        quoted = ', '.join(quote_identifier(column) for column in columns)
+        not_null = ' AND '.join(f'{quote_identifier(column)} IS NOT NULL' for column in columns)
+        query = (
+            f'SELECT COUNT(*), COUNT(DISTINCT {quoted}), SUM({not_null}) FROM {table_name}'
+        )
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor(buffered=True)
+                cursor.execute(query)
+                total, distinct, not_null_count = cursor.fetchone()
+                cursor.close()
+            return total == distinct == (not_null_count or 0)
+        except Error as e:
+            logger.error(f'Error checking uniqueness on {table_name}: {e}')
+            return False
+
+    def insert_data(self, table_name: str, data: pd.DataFrame, method: str = 'row',
+                    batch_size: int = INSERT_BATCH_SIZE, upsert: bool = False,
+                    schema: Optional[TableSchema] = None) -> Optional[int]:
+        '''Inserts data into the specified table and returns the number of rows inserted.'''
+        with stage_timer(self.metrics, 'convert'):
+            rows = frame_rows(data, schema, self.row_buffer())
+        return self.insert_rows(table_name, list(data.columns), rows, method, batch_size, upsert)
+
+    def insert_rows(self, table_name: str, columns: List[str], rows: List[tuple],
+                    method: str = 'row', batch_size: int = INSERT_BATCH_SIZE,
+                    upsert: bool = False) -> Optional[int]:
+        '''Inserts rows already converted to tuples; see insert_data for the methods.'''
+        try:
+            self.write_rows(table_name, columns, rows, method, batch_size, upsert)
             logger.info(f'Data inserted into "{table_name}".')
+            return len(rows)
         except Error as e:
+            if getattr(self._local, 'commit_interval', None):
+                # Inside a bulk load session; raising makes it roll back instead of committing
+                raise
             logger.error(f'Error inserting data into {table_name}: {e}')
+            return None
+
+    def write_rows(self, table_name: str, columns: List[str], rows: List[tuple],
+                   method: str = 'row', batch_size: int = INSERT_BATCH_SIZE,
+                   upsert: bool = False) -> None:
+        '''Writes the rows like insert_rows, but lets database errors propagate.'''
+        placeholders = ', '.join(['%s'] * len(columns))
+        suffix = self.upsert_clause(columns) if upsert else ''
+        insert_query = f'INSERT INTO {table_name} VALUES ({placeholders}){suffix}'
+        metrics = self.metrics
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            start = timer.perf_counter()
+            if method == 'row':
+                for row in rows:
+                    cursor.execute(insert_query, row)
+                self.commit(connection, len(rows))
+                if metrics:
+                    metrics.record_batch(len(rows), timer.perf_counter() - start)
+            elif method == 'executemany':
+                for offset in range(0, len(rows), batch_size):
+                    batch = rows[offset:offset + batch_size]
+                    cursor.executemany(insert_query, batch)
+                    self.commit(connection, len(batch))
+                    if metrics:
+                        metrics.record_batch(len(batch), timer.perf_counter() - start)
+                        start = timer.perf_counter()
+            elif method == 'values':
+                for statement in self.build_values_statements(table_name, rows, suffix):
+                    # Time only the round-trip, not building the next statement
+                    start = timer.perf_counter()
+                    cursor.execute(statement)
+                    self.commit(connection, cursor.rowcount)
+                    if metrics:
+                        metrics.record_batch(cursor.rowcount, timer.perf_counter() - start)
+            else:
+                raise ValueError(f'Unknown insert method "{method}".')
+            cursor.close()
+
+    def server_settings(self) -> dict:
+        '''Returns max_allowed_packet and the escaping mode, queried once per connection.'''
+        with self.get_connection() as connection:
+            connection_id = connection.connection_id
+            if connection_id not in self._server_settings:
+                cursor = connection.cursor(buffered=True)
+                cursor.execute('SELECT @@max_allowed_packet, @@sql_mode')
+                max_allowed_packet, sql_mode = cursor.fetchone()
+                cursor.close()
+                self._server_settings[connection_id] = {
+                    'max_allowed_packet': int(max_allowed_packet),
+                    'backslash_escapes': 'NO_BACKSLASH_ESCAPES' not in str(sql_mode)
+                }
+            return self._server_settings[connection_id]
+
+    @staticmethod
+    def upsert_clause(columns: Sequence[str]) -> str:
+        '''Returns the ON DUPLICATE KEY UPDATE clause overwriting every column.'''
+        updates = ', '.join(
+            f'{quote_identifier(column)} = VALUES({quote_identifier(column)})' for column in columns
+        )
+        return f' ON DUPLICATE KEY UPDATE {updates}'
+
+    def build_values_statements(self, table_name: str, rows: List[tuple],
+                                suffix: str = '') -> Iterator[str]:
+        '''Yields INSERT ... VALUES (...),(...) statements no larger than max_allowed_packet.'''
+        settings = self.server_settings()
+        return values_statements(
+            table_name, rows, settings['max_allowed_packet'], settings['backslash_escapes'], suffix
+        )
+
+    def delete_keys(self, table_name: str, key_columns: List[str], keys: List[tuple],
+                    batch_size: int = INSERT_BATCH_SIZE) -> Optional[int]:
+        '''Deletes the rows whose key is listed, batch_size keys per statement.'''
+        if len(key_columns) == 1:
+            target = quote_identifier(key_columns[0])
+            placeholder = '%s'
+        else:
+            target = '(' + ', '.join(quote_identifier(column) for column in key_columns) + ')'
+            placeholder = '(' + ', '.join(['%s'] * len(key_columns)) + ')'
+        deleted = 0
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                for start in range(0, len(keys), batch_size):
+                    batch = keys[start:start + batch_size]
+                    cursor.execute(
+                        f'DELETE FROM {table_name} WHERE {target} IN '
+                        f'({", ".join([placeholder] * len(batch))})',
+                        [value for key in batch for value in key]
+                    )
+                    deleted += cursor.rowcount
+                    self.commit(connection, len(batch))
+                cursor.close()
+            return deleted
+        except Error as e:
+            logger.error(f'Error deleting rows from {table_name}: {e}')
+            return None
+
+    def query_dataframe(self, query: str, params: Optional[Sequence] = None) -> Optional[pd.DataFrame]:
+        '''Runs a query and returns its result set as a DataFrame.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
+                cursor.close()
+            return pd.DataFrame(rows, columns=columns)
+        except Error as e:
+            logger.error(f'Error running query: {e}')
+            return None
+
+    def table_columns(self, table_name: str) -> List[Tuple[str, str]]:
+        '''Returns the (name, type) of every column of the table, or [] if it does not exist.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f'SHOW COLUMNS FROM {table_name}')
+                columns = [(row[0], row[1]) for row in cursor.fetchall()]
+                cursor.close()
+            return columns
+        except Error:
+            return []
+
+    def primary_key(self, table_name: str) -> List[str]:
+        '''Returns the primary key columns of the table in key order.'''
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Key_name = 'PRIMARY'")
+                rows = sorted(cursor.fetchall(), key=lambda row: row[3])
+                cursor.close()
+            return [row[4] for row in rows]
+        except Error:
+            return []
+
+    def load_data_infile(self, table_name: str, file_path: str, columns: List[str],
+                         column_expressions: Optional[dict] = None, delimiter: str = ',',
+                         quotechar: str = '"', line_terminator: str = '\n',
+                         null_values: Sequence[str] = ('',), ignore_lines: int = 1) -> Optional[int]:
+        '''Bulk-loads a delimited file into the table with LOAD DATA LOCAL INFILE.'''
+        # column_expressions maps a column to a SQL expression over "{value}"
+        column_expressions = column_expressions or {}
+        variables = [f'@c{i}' for i in range(len(columns))]
+        null_list = ', '.join("'" + value.replace("'", "''") + "'" for value in null_values)
+        assignments = ', '.join(
+            f'{quote_identifier(column)} = IF({variable} IN ({null_list}), NULL, '
+            f'{column_expressions.get(column, "{value}").format(value=variable)})'
+            for column, variable in zip(columns, variables)
+        )
+        load_query = (
+            f'LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} CHARACTER SET utf8mb4 '
+            f"FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY %s ESCAPED BY '' "
+            f'LINES TERMINATED BY %s IGNORE {ignore_lines} LINES '
+            f'({", ".join(variables)}) SET {assignments}'
+        )
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                start = timer.perf_counter()
+                cursor.execute(load_query, (str(file_path), delimiter, quotechar, line_terminator))
+                row_count = cursor.rowcount
+                if self.metrics:
+                    self.metrics.record_batch(row_count, timer.perf_counter() - start)
+                warning_count = connection.warning_count
+                self.commit(connection, row_count)
+                cursor.close()
+            if warning_count:
+                logger.warning(f'LOAD DATA into "{table_name}" raised {warning_count} warning(s).')
+            logger.info(f'Loaded {row_count} rows from "{file_path}" into "{table_name}".')
+            return row_count
+        except Error as e:
+            logger.error(f'Error loading "{file_path}" into {table_name}: {e}')
+            return None
+
+    def row_buffer(self) -> List[tuple]:
+        '''Returns this thread's row buffer, refilled by every insert_data call.'''
+        if not hasattr(self._local, 'rows'):
+            self._local.rows = []
+        return self._local.rows
     
     def close(self) -> None:
-        '''Closes the database connection.'''
-        if self.connection and self.connection.is_connected():
+        '''Closes the database connection, or every connection of the pool.'''
+        if self.pool:
+            pool, self.pool = self.pool, None
+            with self._pinned_lock:
+                connections = list(self._pinned)
+                self._pinned.clear()
+            while True:
+                try:
+                    connections.append(pool.get_connection())
+                except PoolError:
+                    break
+            for connection in connections:
+                # close() would only hand a pooled connection back; disconnect() closes it
+                connection.disconnect()
+            logger.info('Database connection pool closed.')
+        elif self.connection and self.connection.is_connected():
             self.connection.close()
             logger.info('Database connection closed.')
 
 
 class CSVToMySQLLoader:
-    def __init__(self, db_manager: MySQLDatabaseManager, csv_files: List[str]) -> None:
+    def __init__(self, db_manager: MySQLDatabaseManager, csv_files: List[str],
+                 engine: str = LOAD_ENGINE, insert_method: str = INSERT_METHOD,
+                 batch_size: int = INSERT_BATCH_SIZE,
+                 chunksize: Optional[int] = LOAD_CHUNKSIZE,
+                 schema_overrides: Optional[dict] = None,
+                 bulk_session: bool = BULK_LOAD_SESSION, load_mode: str = LOAD_MODE,
+                 manifest: Optional[LoadManifest] = None,
+                 delete_missing: bool = DELETE_MISSING_ROWS,
+                 pipeline_consumers: int = PIPELINE_CONSUMERS,
+                 queue_depth: int = PIPELINE_QUEUE_DEPTH,
+                 parquet_cache: Optional[ParquetCache] = None,
+                 optimize_memory: bool = OPTIMIZE_MEMORY,
+                 resumable: bool = RESUMABLE_LOAD,
+                 metrics: Optional[RunMetrics] = None) -> None:
         '''Initializes with a database manager and a list of CSV file paths.'''
+        if engine not in ('pandas', 'infile', 'arrow'):
+            raise ValueError(f'Unknown load engine "{engine}".')
+        if load_mode not in ('append', 'replace', 'swap', 'delta'):
+            raise ValueError(f'Unknown load mode "{load_mode}".')
         self.db_manager = db_manager
         self.csv_files = csv_files
+        self.engine = engine
+        self.insert_method = insert_method
+        self.batch_size = batch_size
+        self.chunksize = chunksize
+        self.schema_overrides = (
+            load_schema_overrides() if schema_overrides is None else schema_overrides
+        )
+        self.bulk_session = bulk_session
+        self.load_mode = load_mode
+        self.manifest = manifest
+        self.delete_missing = delete_missing
+        # More than one pipeline consumer needs a pooled db_manager
+        self.pipeline_consumers = pipeline_consumers
+        self.queue_depth = queue_depth
+        self.parquet_cache = parquet_cache
+        self.optimize_memory = optimize_memory
+        # Resumable pandas loads commit each chunk with a checkpoint in load_checkpoints
+        self.checkpoints = LoadCheckpoints(db_manager) if resumable else None
+        self.metrics = metrics
+        self.file_metrics: Optional[FileMetrics] = None
     
     def load_csv(self, file_path: str) -> Optional[pd.DataFrame]:
-        '''Loads CSV file into a DataFrame.'''
+        '''Loads CSV file into a DataFrame, Arrow-backed with the arrow engine.'''
         try:
-            df = pd.read_csv(file_path)
+            df = self.read_csv(file_path)
             logger.info(f'Loaded data from "{file_path}".')
+            if self.optimize_memory:
+                df, report = optimize_dtypes(df)
+                log_memory_report(get_table_name(file_path), report)
+                write_memory_report(get_table_name(file_path), report)
             return df
-        except FileNotFoundError:
-            logger.error(f'CSV file "{file_path}" not found.')
-            return None
-        except pd.errors.EmptyDataError:
-            logger.error(f'CSV file "{file_path}" is empty.')
-            return None
-        except pd.errors.ParserError:
-            logger.error(f'Error parsing CSV file "{file_path}".')
+        except CSV_ERRORS as e:
+            log_csv_error(file_path, e)
             return None
+
+    def read_csv(self, file_path: str) -> pd.DataFrame:
+        '''Reads the whole CSV file, through the Parquet cache if there is one.'''
+        with stage_timer(self.file_metrics, 'parse'):
+            if self.parquet_cache:
+                return self.parquet_cache.read(file_path)
+            dtypes = csv_dtypes(file_path)
+            with open_csv(file_path) as source:
+                if self.engine == 'arrow':
+                    return pd.read_csv(
+                        source, engine='pyarrow', dtype_backend='pyarrow', dtype=dtypes
+                    )
+                return pd.read_csv(source, dtype=dtypes)
+
+    def iter_csv_chunks(self, file_path: str, chunksize: Optional[int] = None,
+                        skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+        '''Yields the CSV file as DataFrames of at most chunksize rows, after skip_rows rows.'''
+        chunksize = chunksize or self.chunksize
+        if self.parquet_cache:
+            chunks = self.parquet_cache.iter_chunks(file_path, chunksize)
+            for chunk in timed_iter(chunks, self.file_metrics):
+                if skip_rows >= len(chunk):
+                    skip_rows -= len(chunk)
+                    continue
+                yield chunk.iloc[skip_rows:]
+                skip_rows = 0
+            return
+        skiprows = range(1, skip_rows + 1) if skip_rows else None
+        dtypes = csv_dtypes(file_path)
+        with open_csv(file_path) as source, \
+                pd.read_csv(source, chunksize=chunksize, skiprows=skiprows, dtype=dtypes) as reader:
+            yield from timed_iter(reader, self.file_metrics)
     
-    def load_csv_to_db(self) -> None:
-        '''Loads each CSV file into the database.'''
-        for i, csv_file in enumerate(self.csv_files):
-            table_name = Path(csv_file).stem[:-8]
+    def load_csv_to_db(self) -> List[dict]:
+        '''Loads each CSV file into the database and returns the per-file results.'''
+        run_metrics = RunMetrics() if LOAD_METRICS and self.metrics is None else None
+        if run_metrics:
+            self.metrics = run_metrics
+        try:
+            results = [self.load_file(csv_file) for csv_file in self.csv_files]
+        finally:
+            if run_metrics:
+                self.metrics = None
+                run_metrics.finish()
+        log_load_summary(results)
+        return results
+
+    def load_file(self, csv_file: str) -> dict:
+        '''Loads a single CSV file into its table and returns a summary of the load.'''
+        if not self.metrics:
+            return self._load_file(csv_file)
+        file_metrics = self.metrics.start_file(csv_file, get_table_name(csv_file))
+        self.file_metrics = self.db_manager.metrics = file_metrics
+        result = {'rows': 0, 'status': 'failed'}
+        try:
+            result = self._load_file(csv_file)
+            return result
+        finally:
+            self.file_metrics = self.db_manager.metrics = None
+            file_metrics.finish(result['rows'], result['status'])
+
+    def _load_file(self, csv_file: str) -> dict:
+        '''Does the work of load_file.'''
+        table_name = get_table_name(csv_file)
+        start = timer.perf_counter()
+        if self.manifest:
+            try:
+                unchanged, fingerprint = self.manifest.check(csv_file, table_name)
+            except FileNotFoundError:
+                logger.error(f'CSV file "{csv_file}" not found.')
+                return load_result(csv_file, table_name, status='failed')
+            if unchanged and self.db_manager.table_exists(table_name):
+                logger.info(f'Skipping "{csv_file}", unchanged since its last load.')
+                return load_result(csv_file, table_name, fingerprint.get('rows', 0),
+                                   status='skipped')
+            self.manifest.forget(csv_file)
+        else:
+            fingerprint = None
+        key_columns = delta_key(self, csv_file, table_name) if self.load_mode == 'delta' else []
+        target_table = staging_table_name(table_name) if self.load_mode == 'swap' else table_name
+        checkpoint = None
+        if self.checkpoints and not key_columns and self.engine == 'pandas' \
+                and not self.pipeline_consumers:
+            checkpoint = resume_point(self, csv_file, target_table, fingerprint)
+        # Keep the rows an interrupted load already committed
+        resuming = bool(checkpoint and checkpoint['rows_committed'])
+        if self.load_mode == 'swap':
+            if not resuming:
+                self.db_manager.drop_table(target_table)
+        elif not key_columns and self.load_mode != 'append' and not resuming:
+            self.db_manager.drop_table(table_name)
+        if not key_columns:
+            # Stored row hashes are only valid while every write goes through delta loads
+            self.db_manager.drop_table(hash_table_name(table_name))
+        # Rows appended or upserted into an existing table must still match its foreign keys
+        session = (
+            self.db_manager.bulk_load_session(
+                target_table, foreign_key_checks=bool(key_columns) or self.load_mode == 'append'
+            ) if self.bulk_session else nullcontext()
+        )
+        try:
+            with session as connection:
+                if key_columns:
+                    rows, schema = load_csv_delta(self, csv_file, table_name, key_columns)
+                else:
+                    rows, schema = self.load_table(csv_file, table_name, target_table, checkpoint)
+                if rows is None and connection is not None:
+                    # The load failed without raising (e.g. a parse error); commit none of it
+                    connection.rollback()
+        except Error as e:
+            logger.error(f'Error during bulk load session for {table_name}: {e}')
+            rows, schema = None, None
+        if rows is not None and checkpoint is not None:
+            # Every row is in; a later failure (keys, swap) restarts the load from scratch
+            self.checkpoints.forget(csv_file)
+        index_seconds = None
+        if rows is not None and schema is not None:
+            index_seconds = self.build_keys(target_table, schema)
+        if rows is not None and self.load_mode == 'swap':
+            if not swap_in(self.db_manager, table_name, target_table, rows):
+                rows = None
+        if rows is not None and self.load_mode == 'delta' and not key_columns \
+                and schema is not None and schema.primary_key:
+            # A full load in delta mode seeds the hashes the next delta load compares with
+            store_row_hashes(self, csv_file, table_name, schema.primary_key)
+        if rows is not None and self.manifest:
+            # A delta load writes only the changed rows; the manifest keeps the table's size
+            table_rows = self.db_manager.count_rows(table_name) if key_columns else rows
+            self.manifest.record(csv_file, table_name, fingerprint, table_rows or rows)
+        return load_result(
+            csv_file, table_name, rows or 0, timer.perf_counter() - start, index_seconds or 0.0,
+            'failed' if rows is None else 'loaded'
+        )
+
+    def load_table(self, csv_file: str, table_name: str, target_table: Optional[str] = None,
+                   checkpoint: Optional[dict] = None
+                   ) -> Tuple[Optional[int], Optional[TableSchema]]:
+        '''Creates target_table (default table_name) and writes the file's rows into it.'''
+        target_table = target_table or table_name
+        if self.engine == 'infile':
+            rows, schema = load_csv_infile(self, csv_file, table_name, target_table)
+        elif self.engine == 'arrow':
+            rows, schema = load_csv_arrow(self, csv_file, table_name, target_table)
+        elif self.pipeline_consumers:
+            rows, schema = load_csv_pipelined(self, csv_file, table_name, target_table)
+        elif self.chunksize or checkpoint is not None:
+            rows, schema = load_csv_chunked(self, csv_file, table_name, target_table, checkpoint)
+        else:
+            rows, schema = None, None
             df = self.load_csv(csv_file)
             if df is not None:
-                columns = self.generate_columns_definition(df)
-                self.db_manager.create_table(table_name, columns)
-                self.db_manager.insert_data(table_name, df)
+                schema = infer_table_schema(df, table_name, self.schema_overrides)
+                self.db_manager.create_table(target_table, schema.definition())
+                try:
+                    df = schema.coerce(df)
+                except pd.errors.ParserError as e:
+                    log_csv_error(csv_file, e)
+                    return None, schema
+                rows = self.db_manager.insert_data(
+                    target_table, df, self.insert_method, self.batch_size, schema=schema
+                )
+        return rows, schema
+
+    def build_keys(self, table_name: str, schema: TableSchema) -> Optional[float]:
+        '''Adds the primary key and indexes once the table is loaded.'''
+        # A primary key detected from a sample may not hold for the whole file
+        if schema.sample and schema.primary_key:
+            if not self.db_manager.is_unique(table_name, schema.primary_key):
+                logger.warning(
+                    f'Candidate primary key {schema.primary_key} of "{table_name}" is not unique; '
+                    f'adding a plain index instead.'
+                )
+                schema.indexes.insert(0, schema.primary_key)
+                schema.primary_key = []
+        if not schema.primary_key and not schema.indexes:
+            return None
+        return self.db_manager.add_keys(table_name, schema)
     
+    def reconnect(self) -> None:
+        '''Counts a retry and reconnects before it.'''
+        if self.file_metrics:
+            self.file_metrics.add(retries=1)
+        self.db_manager.reconnect()
+
     @staticmethod
     def generate_columns_definition(df: pd.DataFrame) -> str:
         '''Generates a MySQL-compatible column definition from the DataFrame.'''
-        return ', '.join([f'{col} VARCHAR(255)' for col in df.columns])
+        return infer_schema(df, '').definition()
+
+def load_csv_to_db_parallel(db_settings: dict, csv_files: List[str], workers: int = LOAD_WORKERS,
+                            **loader_options) -> List[dict]:
+    '''Loads CSV files on a pool of worker threads, each with its own database connection.'''
+    local = threading.local()
+    managers = []
+    managers_lock = threading.Lock()
+    run_metrics = RunMetrics() if LOAD_METRICS and 'metrics' not in loader_options else None
+    if run_metrics:
+        loader_options['metrics'] = run_metrics
+
+    def load(csv_file: str) -> dict:
+        if not hasattr(local, 'loader'):
+            db_manager = MySQLDatabaseManager(
+                **db_settings, allow_local_infile=loader_options.get('engine', LOAD_ENGINE) == 'infile'
+            )
+            with managers_lock:
+                managers.append(db_manager)
+            local.loader = CSVToMySQLLoader(db_manager, [], **loader_options)
+        if not local.loader.db_manager.is_connected():
+            return load_result(csv_file, get_table_name(csv_file), status='failed')
+        return local.loader.load_file(csv_file)
+
+    # Largest first, so the biggest load does not start last; a missing file sorts last
+    # and is reported as failed by its load
+    csv_files = sorted(
+        csv_files, key=lambda path: os.path.getsize(path) if os.path.exists(path) else 0,
+        reverse=True
+    )
+    logger.info(f'Loading {len(csv_files)} file(s) with {workers} worker(s).')
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(load, csv_files))
+    finally:
+        for db_manager in managers:
+            db_manager.close()
+        if run_metrics:
+            run_metrics.finish()
+    log_load_summary(results)
+    return results
 
 def get_files(folder_path: str, file_extension: str = 'csv') -> List[str]:
     '''Retrieves all files with specified extension from specified folder.'''
@@ -112,8 +864,11 @@ def get_files(folder_path: str, file_extension: str = 'csv') -> List[str]:
             logger.error(f'Folder "{folder_path}" does not exist.')
             return []
 
-        # List all files with the specified extension
-        files = [f for f in os.listdir(folder_path) if f.endswith(file_extension)]
+        # List all files with the specified extension, also under a compression suffix
+        # (.gz, .bz2, .xz, .zst), which the readers decompress as they stream the file
+        files = [
+            f for f in os.listdir(folder_path) if strip_compression(f).endswith(file_extension)
+        ]
         full_paths = [os.path.join(folder_path, f) for f in files]
         
         if not full_paths:
@@ -142,13 +897,44 @@ def main():
     file_extension = 'csv'
     csv_files = get_files(EXTERNAL_DATA_DIR, file_extension)
 
+    # Load into a local SQLite or DuckDB file instead of the MySQL server
+    if LOAD_BACKEND != 'mysql':
+        from src.backends import BackendLoader, create_backend
+
+        backend = create_backend(LOAD_BACKEND)
+        if backend.connect():
+            # LOAD DATA and delta loads are MySQL-only
+            engine = 'arrow' if LOAD_ENGINE == 'arrow' else 'pandas'
+            load_mode = 'replace' if LOAD_MODE == 'delta' else LOAD_MODE
+            BackendLoader(backend, csv_files, engine, load_mode).load_csv_to_db()
+            backend.close()
+        return
+
+    # Skip files that have not changed since their last successful load
+    manifest = LoadManifest() if INCREMENTAL_LOAD else None
+
+    # Read files from their typed Parquet copies, converting only changed CSVs
+    parquet_cache = ParquetCache() if PARQUET_CACHE and LOAD_ENGINE != 'infile' else None
+
+    # Load files concurrently when more than one worker is configured
+    if LOAD_WORKERS > 1:
+        load_csv_to_db_parallel(
+            db_settings, csv_files, LOAD_WORKERS, engine=LOAD_ENGINE, manifest=manifest,
+            parquet_cache=parquet_cache
+        )
+        return
+
     # Initialize the database manager
-    db_manager = MySQLDatabaseManager(**db_settings)
+    db_manager = MySQLDatabaseManager(
+        **db_settings, allow_local_infile=LOAD_ENGINE == 'infile', pool_size=MYSQL_POOL_SIZE
+    )
 
     # If the connection was successful, proceed
-    if db_manager.connection:
+    if db_manager.is_connected():
         # Initialize the CSV loader and load data
-        loader = CSVToMySQLLoader(db_manager, csv_files)
+        loader = CSVToMySQLLoader(
+            db_manager, csv_files, LOAD_ENGINE, manifest=manifest, parquet_cache=parquet_cache
+        )
         loader.load_csv_to_db()
 
         # Close the database connection
@@ -0,0 +1,14 @@
+import pytest
+
+from src.schema import TableSchema
+
+
+@pytest.fixture(autouse=True)
+def schema_reports_dir(tmp_path, monkeypatch):
+    '''Writes schema reports under tmp_path instead of the repo's reports/ directory.'''
+    write_report = TableSchema.write_report
+    reports_dir = tmp_path / 'schema'
+    monkeypatch.setattr(
+        TableSchema, 'write_report', lambda self, reports_dir=reports_dir: write_report(self, reports_dir)
+    )
+    return reports_dir
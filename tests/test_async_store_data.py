@@ -0,0 +1,106 @@
+import asyncio
+
+import pandas as pd
+
+import src.async_store_data as async_store_data
+from src.async_store_data import AsyncCSVToMySQLLoader
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query):
+        self.pool.statements.append(query)
+
+    async def executemany(self, query, rows):
+        self.pool.inserted.extend(rows)
+
+    async def fetchone(self):
+        return (len(self.pool.inserted), len(self.pool.inserted))
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return FakeCursor(self.pool)
+
+    async def commit(self):
+        self.pool.commits += 1
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return FakeConnection(self.pool)
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakePool:
+    '''Stands in for an aiomysql pool, recording statements and inserted rows.'''
+
+    def __init__(self):
+        self.statements = []
+        self.inserted = []
+        self.commits = 0
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+
+def write_customers(tmp_path, rows=39):
+    csv_file = tmp_path / 'customers_dataset.csv'
+    pd.DataFrame({
+        'customer_id': range(1, rows + 1),
+        'city': [f'city {i % 5}' for i in range(rows)],
+    }).to_csv(csv_file, index=False)
+    return str(csv_file)
+
+
+def load(csv_file, pool):
+    loader = AsyncCSVToMySQLLoader(
+        {}, [csv_file], in_flight=2, batch_size=5, chunksize=10, schema_overrides={}, pool=pool
+    )
+    return asyncio.run(loader.load_csv_to_db())[0]
+
+
+def test_loads_every_chunk(tmp_path, schema_reports_dir):
+    pool = FakePool()
+    result = load(write_customers(tmp_path), pool)
+
+    assert result['status'] == 'loaded'
+    assert result['rows'] == 39
+    assert sorted(row[0] for row in pool.inserted) == list(range(1, 40))
+    assert any(query.startswith('ALTER TABLE customers') for query in pool.statements)
+    assert (schema_reports_dir / 'customers.json').exists()
+
+
+def test_mid_file_error_fails_the_load(tmp_path, monkeypatch):
+    convert_chunk = async_store_data.convert_chunk
+    calls = []
+
+    def failing_convert_chunk(schema, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise ValueError('bad chunk')
+        return convert_chunk(schema, chunk)
+
+    monkeypatch.setattr(async_store_data, 'convert_chunk', failing_convert_chunk)
+    pool = FakePool()
+    result = load(write_customers(tmp_path), pool)
+
+    assert result['status'] == 'failed'
+    assert result['rows'] == 10
+    assert not any(query.startswith('ALTER TABLE') for query in pool.statements)
@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+
+import pytest
+from mysql.connector import Error, errorcode
+
+import src.retry as retry
+from src.load_chunked import load_csv_chunked, resume_point
+from src.manifest import file_hash
+from src.store_data import CSVToMySQLLoader
+
+
+class FakeManager:
+    '''Stands in for MySQLDatabaseManager, keeping only the rows of committed transactions.'''
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.tables = {}
+        self.pending = []
+        self.reconnects = 0
+
+    @contextmanager
+    def transaction(self):
+        self.pending = []
+        yield None
+        for table, rows in self.pending:
+            self.tables.setdefault(table, []).extend(rows)
+
+    def write_rows(self, table_name, columns, rows, insert_method, batch_size):
+        self.pending.append((table_name, list(rows)))
+        if self.failures:
+            raise self.failures.pop(0)
+
+    def row_buffer(self):
+        return []
+
+    def reconnect(self):
+        self.reconnects += 1
+
+    def table_exists(self, table_name):
+        return table_name in self.tables
+
+    def create_table(self, table_name, columns_definition):
+        self.tables.setdefault(table_name, [])
+
+
+class FakeCheckpoints:
+    def __init__(self, manager, checkpoint=None):
+        self.manager = manager
+        self.checkpoint = checkpoint
+        self.forgotten = False
+
+    def get(self, file_path):
+        return self.checkpoint
+
+    def record(self, file_path, sha256, target_table, rows_committed, batch_id):
+        # Written in the chunk's transaction, so only kept if the chunk commits
+        self.manager.pending.append(('checkpoints', [(rows_committed, batch_id)]))
+
+    def forget(self, file_path):
+        self.forgotten = True
+        self.checkpoint = None
+
+
+def make_loader(manager, checkpoint=None):
+    loader = CSVToMySQLLoader(manager, [], schema_overrides={}, resumable=False)
+    loader.checkpoints = FakeCheckpoints(manager, checkpoint)
+    return loader
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'customers.csv'
+    path.write_text('customer_id,city\n' + ''.join(f'{i},city{i}\n' for i in range(1, 11)))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+
+
+def transient_error():
+    return Error(msg='Lost connection', errno=errorcode.CR_SERVER_LOST)
+
+
+def test_matching_checkpoint_is_resumed(csv_file):
+    manager = FakeManager()
+    manager.tables['customers'] = []
+    checkpoint = {'file_sha256': file_hash(csv_file), 'target_table': 'customers',
+                  'rows_committed': 4, 'batch_id': 2}
+
+    assert resume_point(make_loader(manager, checkpoint), csv_file, 'customers') == checkpoint
+
+
+@pytest.mark.parametrize('sha256, target_table', [
+    ('0' * 64, 'customers'),
+    (None, 'customers__staging'),
+])
+def test_stale_checkpoint_is_dropped(csv_file, sha256, target_table):
+    manager = FakeManager()
+    manager.tables['customers'] = []
+    loader = make_loader(manager, {'file_sha256': sha256 or file_hash(csv_file),
+                                   'target_table': target_table,
+                                   'rows_committed': 4, 'batch_id': 2})
+
+    resumed = resume_point(loader, csv_file, 'customers')
+
+    assert loader.checkpoints.forgotten
+    assert (resumed['rows_committed'], resumed['batch_id']) == (0, 0)
+    assert resumed['file_sha256'] == file_hash(csv_file)
+
+
+def test_checkpoint_of_a_dropped_table_is_not_resumed(csv_file):
+    loader = make_loader(FakeManager(), {'file_sha256': file_hash(csv_file),
+                                         'target_table': 'customers',
+                                         'rows_committed': 4, 'batch_id': 2})
+
+    assert resume_point(loader, csv_file, 'customers')['rows_committed'] == 0
+
+
+def test_chunk_is_written_once_after_a_transient_error(csv_file):
+    manager = FakeManager(failures=[transient_error()])
+    loader = make_loader(manager)
+    loader.chunksize = 4
+
+    rows, _ = load_csv_chunked(loader, csv_file, 'customers', checkpoint=resume_point(
+        loader, csv_file, 'customers'
+    ))
+
+    assert rows == 10
+    assert [row[0] for row in manager.tables['customers']] == list(range(1, 11))
+    assert manager.tables['checkpoints'] == [(4, 1), (8, 2), (10, 3)]
+    assert manager.reconnects == 1
+
+
+def test_non_transient_error_fails_without_a_retry(csv_file):
+    manager = FakeManager(failures=[Error(msg='Syntax', errno=errorcode.ER_PARSE_ERROR)])
+    loader = make_loader(manager)
+
+    rows, _ = load_csv_chunked(loader, csv_file, 'customers', checkpoint=resume_point(
+        loader, csv_file, 'customers'
+    ))
+
+    assert rows is None
+    assert manager.tables['customers'] == []
+    assert manager.reconnects == 0
+
+
+def test_resume_skips_the_rows_of_committed_chunks(csv_file):
+    manager = FakeManager()
+    manager.tables['customers'] = [(i, f'city{i}') for i in range(1, 5)]
+    loader = make_loader(manager, {'file_sha256': file_hash(csv_file),
+                                   'target_table': 'customers',
+                                   'rows_committed': 4, 'batch_id': 1})
+    loader.chunksize = 4
+
+    rows, schema = load_csv_chunked(loader, csv_file, 'customers', checkpoint=resume_point(
+        loader, csv_file, 'customers'
+    ))
+
+    assert rows == 10
+    assert [row[0] for row in manager.tables['customers']] == list(range(1, 11))
+    assert manager.tables['checkpoints'] == [(8, 2), (10, 3)]
+    # Types come from the first chunk, as in the interrupted load
+    fresh = make_loader(FakeManager())
+    fresh.chunksize = 4
+    _, first_schema = load_csv_chunked(fresh, csv_file, 'customers', checkpoint=resume_point(
+        fresh, csv_file, 'customers'
+    ))
+    assert schema.definition() == first_schema.definition()
@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from src.delta import changed_rows, deleted_keys, row_hashes, stored_hashes
+
+
+def customers(**columns):
+    return pd.DataFrame({'customer_id': [1, 2, 3], **columns})
+
+
+def test_hash_does_not_depend_on_the_chunk_dtypes():
+    # A missing value in one chunk turns its integers into floats
+    ints = pd.DataFrame({'customer_id': [1, 2], 'visits': [3, 4]})
+    floats = pd.DataFrame({'customer_id': [1, 2, 9], 'visits': [3.0, 4.0, np.nan]})
+    objects = pd.DataFrame({'customer_id': [1, 2], 'visits': ['3', '4']}, dtype=object)
+
+    expected = row_hashes(ints).tolist()
+    assert row_hashes(floats).tolist()[:2] == expected
+    assert row_hashes(objects).tolist() == expected
+
+
+def test_hash_of_timestamps_keeps_the_time():
+    midnight = customers(seen=pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']))
+    later = customers(seen=pd.to_datetime(['2024-01-01 00:00:01', '2024-01-02 00:00:00',
+                                         '2024-01-03 00:00:00']))
+
+    assert (row_hashes(midnight) != row_hashes(later)).tolist() == [True, False, False]
+
+
+def test_hash_tells_missing_values_and_column_boundaries_apart():
+    df = pd.DataFrame({'a': ['x', None, '', 'ab', 'a'], 'b': ['', '', None, 'c', 'bc']})
+    hashes = row_hashes(df).tolist()
+
+    assert len(set(hashes)) == len(hashes)
+
+
+def test_changed_rows_compares_csv_keys_with_database_keys():
+    chunk = customers(city=['Austin', 'Boston', 'Chicago'])
+    hashes = row_hashes(chunk)
+    # Keys come back from MySQL as the table's type, here strings of a VARCHAR key
+    stored = stored_hashes(
+        pd.DataFrame({'customer_id': ['1', '2'], 'row_hash': [hashes[0], hashes[1] + 1]}),
+        ['customer_id']
+    )
+
+    changed, changed_hashes, keys = changed_rows(chunk, ['customer_id'], stored)
+
+    assert changed['customer_id'].tolist() == [2, 3]
+    assert changed_hashes['row_hash'].tolist() == hashes[1:].tolist()
+    assert list(keys) == ['1', '2', '3']
+
+
+def test_unchanged_rows_are_skipped_whatever_the_key_type():
+    chunk = customers(city=['Austin', 'Boston', 'Chicago'])
+    stored = stored_hashes(
+        pd.DataFrame({'customer_id': [1, 2, 3], 'row_hash': row_hashes(chunk).to_numpy()}),
+        ['customer_id']
+    )
+
+    changed, _, _ = changed_rows(chunk, ['customer_id'], stored)
+
+    assert changed.empty
+
+
+def test_deleted_keys_single_and_composite():
+    single = stored_hashes(
+        pd.DataFrame({'customer_id': [1, 2, 3], 'row_hash': [10, 20, 30]}), ['customer_id']
+    )
+    seen = changed_rows(customers(city=['a', 'b', 'c']).iloc[[0, 2]], ['customer_id'], single)[2]
+    assert deleted_keys(single, seen, ['customer_id']) == [('2',)]
+
+    composite = stored_hashes(
+        pd.DataFrame({'store': [1, 1, 2], 'sku': ['a', 'b', 'a'], 'row_hash': [1, 2, 3]}),
+        ['store', 'sku']
+    )
+    chunk = pd.DataFrame({'store': [1, 2], 'sku': ['a', 'a'], 'price': [1.5, 2.5]})
+    seen = changed_rows(chunk, ['store', 'sku'], composite)[2]
+    assert deleted_keys(composite, seen, ['store', 'sku']) == [('1', 'b')]
+
+
+def test_date_and_decimal_keys_match_the_values_mysql_returns():
+    # Non-ISO dates are parsed to timestamps, MySQL returns DATE keys as date objects
+    chunk = pd.DataFrame({'day': pd.to_datetime(['2024-01-15', '2024-01-16']),
+                          'price': [1.5, 2.0], 'qty': [1, 2]})
+    key_kinds = {'day': 'date', 'price': 'decimal'}
+    stored = stored_hashes(
+        pd.DataFrame({'day': [date(2024, 1, 15), date(2024, 1, 16)],
+                      'price': [Decimal('1.50'), Decimal('2.00')],
+                      'row_hash': row_hashes(chunk).to_numpy()}),
+        ['day', 'price'], key_kinds
+    )
+
+    changed, _, keys = changed_rows(chunk, ['day', 'price'], stored, key_kinds)
+
+    assert changed.empty
+    assert deleted_keys(stored, keys, ['day', 'price']) == []
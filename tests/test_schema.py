@@ -0,0 +1,41 @@
+import io
+
+import pandas as pd
+import pytest
+
+from src.rows import frame_rows
+from src.schema import infer_column, infer_schema
+
+
+def read(text):
+    return pd.read_csv(io.StringIO(text))
+
+
+def test_flag_column_with_empty_cells_is_boolean():
+    df = read('customer_id,active\n1,True\n2,\n3,False\n')
+    column = infer_column(df['active'])
+
+    assert df['active'].dtype == object
+    assert (column.mysql_type, column.kind, column.nullable) == ('TINYINT(1)', 'boolean', True)
+    assert [row[1] for row in frame_rows(df, infer_schema(df, 'customers'))] == [True, None, False]
+
+
+def test_mixed_strings_and_flags_stay_text():
+    column = infer_column(read('status\nTrue\nmaybe\n')['status'])
+
+    assert column.kind == 'string'
+
+
+def test_coerce_parses_dates_in_the_sampled_format():
+    schema = infer_schema(read('signup\n03/31/2024\n12/01/2023\n'), 'customers', sample=True)
+    coerced = schema.coerce(read('signup,id\n01/15/2024,1\n,2\n'))
+
+    assert coerced['signup'].iloc[0] == pd.Timestamp('2024-01-15')
+    assert coerced['signup'].isna().iloc[1]
+
+
+def test_coerce_fails_on_a_date_outside_the_sampled_format():
+    schema = infer_schema(read('signup\n03/31/2024\n12/01/2023\n'), 'customers', sample=True)
+
+    with pytest.raises(pd.errors.ParserError, match='1 value'):
+        schema.coerce(read('signup\n01/15/2024\n2024-02-30\n'))
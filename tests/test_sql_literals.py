@@ -0,0 +1,80 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from mysql.connector import Error
+
+from src.sql_literals import PACKET_HEADROOM, format_sql_literal, values_statements
+
+
+@pytest.mark.parametrize('value, literal', [
+    ("O'Brien", r"'O\'Brien'"),
+    ('C:\\temp', r"'C:\\temp'"),
+    ('a\0b', r"'a\0b'"),
+    ('line\nbreak\r', r"'line\nbreak\r'"),
+    ('ctrl\x1az', r"'ctrl\Zz'"),
+    ("\\'; DROP TABLE customers; --", r"'\\\'; DROP TABLE customers; --'"),
+])
+def test_strings_are_backslash_escaped(value, literal):
+    assert format_sql_literal(value) == literal
+
+
+@pytest.mark.parametrize('value, literal', [
+    ("O'Brien", "'O''Brien'"),
+    ('C:\\temp', "'C:\\temp'"),
+    ("\\'; DROP TABLE customers; --", "'\\''; DROP TABLE customers; --'"),
+])
+def test_strings_under_no_backslash_escapes_double_quotes_only(value, literal):
+    assert format_sql_literal(value, backslash_escapes=False) == literal
+
+
+@pytest.mark.parametrize('value, literal', [
+    (None, 'NULL'),
+    (True, '1'),
+    (np.bool_(False), '0'),
+    (42, '42'),
+    (np.int64(-7), '-7'),
+    (1.5, '1.5'),
+    (np.float64(1.5), '1.5'),
+    (np.float32(0.25), '0.25'),
+    (float('nan'), 'NULL'),
+    (np.float64('inf'), 'NULL'),
+    (Decimal('12.340'), '12.340'),
+    (b'\x00\xff', "X'00ff'"),
+    (date(2024, 1, 31), "'2024-01-31'"),
+    (datetime(2024, 1, 31, 8, 5), "'2024-01-31 08:05:00.000000'"),
+])
+def test_non_string_values(value, literal):
+    assert format_sql_literal(value) == literal
+
+
+def test_statements_are_split_at_the_packet_limit():
+    rows = [(i, 'x' * 10) for i in range(100)]
+    prefix = 'INSERT INTO customers VALUES '
+    row_size = len("(10, 'xxxxxxxxxx')") + 1
+    max_allowed_packet = PACKET_HEADROOM + len(prefix) + 10 * row_size
+
+    statements = list(values_statements('customers', rows, max_allowed_packet))
+
+    assert all(len(statement) <= max_allowed_packet - PACKET_HEADROOM for statement in statements)
+    assert sum(statement.count('(') for statement in statements) == 100
+    assert statements[0] == prefix + ','.join(f"({i}, 'xxxxxxxxxx')" for i in range(10))
+
+
+def test_upsert_suffix_counts_towards_the_limit():
+    rows = [(i,) for i in range(10, 20)]
+    suffix = ' ON DUPLICATE KEY UPDATE `id` = VALUES(`id`)'
+    max_allowed_packet = PACKET_HEADROOM + len('INSERT INTO t VALUES ') + 5 * 5 + len(suffix)
+
+    statements = list(values_statements('t', rows, max_allowed_packet, suffix=suffix))
+
+    assert len(statements) == 2
+    assert all(statement.endswith(suffix) for statement in statements)
+
+
+def test_row_larger_than_the_packet_is_reported():
+    rows = [(1, 'small'), (2, 'x' * 5000)]
+
+    with pytest.raises(Error, match='Row 1 .* too large for max_allowed_packet'):
+        list(values_statements('customers', rows, PACKET_HEADROOM + 1000))